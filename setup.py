@@ -17,6 +17,8 @@ setup(
     entry_points={
         'console_scripts': [
             'snow-sim=snow.main:main',
+            'snow-bench=snow.bench:main',
+            'snow-sweep=snow.sweep:main',
         ],
     },
     author="Aaron Bockelie",
@@ -0,0 +1,269 @@
+"""Benchmark and statistical equivalence suite for the snow simulation engines.
+
+Runs seeded headless simulations at several grid sizes and weather scenarios,
+recording throughput alongside physical observables, and checks each engine
+against the reference engine within tolerance bands. The reference is the
+scalar engine of the same tree, so these checks show the engines agree with
+one another, not that the physics matches an earlier version; for that, save
+results from the earlier tree and pass them as --baseline, which also checks
+each run's snow height and populations against the saved ones:
+
+    python -m snow.bench
+    python -m snow.bench --sizes 40x20 --scenarios calm --ticks 200
+    python -m snow.bench --save baseline.json
+    python -m snow.bench --baseline baseline.json
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from . import config
+from .main import SnowSimulation, parse_size
+
+# Visible (width, height) of the simulated terminals
+SIZES = [(40, 20), (80, 30), (120, 40)]
+
+# Weather held constant for a whole run
+SCENARIOS = {
+    'calm': {'temperature': -5, 'wind': 0.0, 'spawn_rate': 0.3},
+    'windy': {'temperature': -5, 'wind': 0.6, 'spawn_rate': 0.3},
+    'thaw': {'temperature': 0, 'wind': 0.0, 'spawn_rate': 0.3},
+}
+
+# Config overrides selecting each engine; the first is the reference
+ENGINES = {
+    'scalar': {'FLAKE_ENGINE': 'scalar'},
+    'vectorized': {'FLAKE_ENGINE': 'vectorized'},
+    'default': {},  # Whatever config.yaml ships
+}
+REFERENCE = 'scalar'
+
+# Fewest settled flakes per engine for comparing fall time distributions
+MIN_FALL_SAMPLES = 20
+
+# Particle types whose populations are tracked
+POPULATIONS = {
+    'flakes': config.SNOW_FLAKES,
+    'snow': config.SNOW,
+    'packed': config.PACKED_SNOW,
+    'ice': config.ICE,
+}
+
+# Populations of the off-screen margins, which must evolve like the visible area
+MARGIN_POPULATIONS = {
+    'margin_flakes': (config.SNOW_FLAKES,),
+    'margin_settled': (config.SNOW, config.PACKED_SNOW, config.ICE),
+}
+
+def run_simulation(size, scenario, seed, ticks, sample_every=10, overrides=None):
+    """Run one seeded headless simulation and return its observables."""
+    random.seed(seed)
+    np.random.seed(seed)
+    with config.overrides(overrides or {}):
+        simulation = SnowSimulation(size)
+        simulation.state['temperature'] = scenario['temperature']
+        simulation.state['current_spawn_rate'] = scenario['spawn_rate']
+        # Hold the wind steady, unless the scenario blows it in gusts from calm
+        gust_every = scenario.get('gust_every', 0)
+        if not gust_every:
+            simulation.physics.wind_strength = scenario['wind']
+            simulation.physics.target_wind_strength = scenario['wind']
+        grid = simulation.grid
+        grid.settle_log = []
+
+        heights = []
+        backoffs = []
+        populations = {name: [] for name in list(POPULATIONS) + list(MARGIN_POPULATIONS)}
+        margins = np.ones(grid.width, dtype=bool)
+        margins[grid.visible_start:grid.visible_start + grid.visible_width] = False
+        fall_times = []
+        elapsed = 0.0
+        for tick in range(ticks):
+            if gust_every and tick % gust_every == 0:
+                simulation.physics.set_target_wind(scenario['wind'])  # As the arrow keys do
+            start = time.perf_counter()
+            simulation.step()
+            elapsed += time.perf_counter() - start
+
+            # Ticks from spawning to settling of each flake that landed
+            fall_times.extend(tick - birth for birth in grid.settle_log)
+            grid.settle_log.clear()
+
+            if tick % sample_every == 0:
+                heights.append(simulation.physics.snow_height)
+                backoffs.append(simulation.physics.current_backoff)
+                counts = np.bincount(grid.grid.ravel(), minlength=len(POPULATIONS) + 1)
+                for name, value in POPULATIONS.items():
+                    populations[name].append(int(counts[value]))
+                for name, types in MARGIN_POPULATIONS.items():
+                    populations[name].append(int(np.isin(grid.grid[:, margins], types).sum()))
+
+    return {
+        'ticks_per_second': ticks / elapsed if elapsed else 0.0,
+        'heights': heights,
+        'backoffs': backoffs,
+        'populations': populations,
+        'fall_times': fall_times,
+    }
+
+def ks_statistic(a, b):
+    """Get the two-sample Kolmogorov-Smirnov statistic of two samples."""
+    if not len(a) or not len(b):
+        return 0.0 if len(a) == len(b) else 1.0
+    a, b = np.sort(a), np.sort(b)
+    values = np.concatenate([a, b])
+    cdf_a = np.searchsorted(a, values, side='right') / len(a)
+    cdf_b = np.searchsorted(b, values, side='right') / len(b)
+    return float(np.max(np.abs(cdf_a - cdf_b)))
+
+def summarize(runs):
+    """Combine the runs of several seeds into one set of observables."""
+    heights = np.mean([run['heights'] for run in runs], axis=0)
+    populations = {}
+    for name in runs[0]['populations']:
+        series = np.mean([run['populations'][name] for run in runs], axis=0)
+        populations[name] = float(np.mean(series[len(series) // 2:]))  # Second half, past spin-up
+    fall_times = np.concatenate([np.asarray(run['fall_times'], dtype=float) for run in runs])
+    return {
+        'ticks_per_second': float(np.mean([run['ticks_per_second'] for run in runs])),
+        'heights': heights.tolist(),
+        'populations': populations,
+        'fall_times': fall_times,
+        'mean_fall_time': float(fall_times.mean()) if len(fall_times) else 0.0,
+    }
+
+def compare(summary, reference, args):
+    """Check an engine's observables against the reference, returning the failures."""
+    failures = []
+
+    height_error = float(np.mean(np.abs(np.subtract(summary['heights'], reference['heights']))))
+    summary['height_error'] = height_error
+    if height_error > args.height_tolerance:
+        failures.append(f"height differs by {height_error:.2f} rows")
+
+    for name, expected in reference['populations'].items():
+        actual = summary['populations'][name]
+        error = abs(actual - expected) / max(expected, args.min_population)
+        if error > args.population_tolerance:
+            failures.append(f"{name} population {actual:.0f} vs {expected:.0f}")
+
+    # Too few landings to say anything about their distribution
+    n, m = len(summary['fall_times']), len(reference['fall_times'])
+    if min(n, m) < MIN_FALL_SAMPLES:
+        summary['fall_time_ks'] = None
+        return failures
+
+    ks = ks_statistic(summary['fall_times'], reference['fall_times'])
+    summary['fall_time_ks'] = ks
+    # Small samples differ by chance, so never demand more than the 1% critical value
+    critical = 1.63 * np.sqrt((n + m) / (n * m))
+    if ks > max(args.ks_tolerance, critical):
+        failures.append(f"fall times differ (KS {ks:.3f})")
+
+    return failures
+
+def check_baseline(key, summary, baseline, args):
+    """Check throughput and observables against a saved baseline, returning the failures."""
+    if key not in baseline:
+        return []
+    saved = baseline[key]
+    failures = []
+    expected = saved['ticks_per_second']
+    if summary['ticks_per_second'] < expected * (1 - args.slowdown):
+        failures.append(f"throughput {summary['ticks_per_second']:.1f}/s vs baseline {expected:.1f}/s")
+    # Saved results keep no fall times, so only height and populations are compared
+    if len(saved['heights']) == len(summary['heights']):
+        reference = {'heights': saved['heights'], 'populations': saved['populations'], 'fall_times': []}
+        drift = compare(dict(summary), reference, args)
+        failures += [f"{failure} (baseline)" for failure in drift]
+    return failures
+
+def parse_args(argv):
+    """Parse the command line."""
+    parser = argparse.ArgumentParser(prog='snow.bench', description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(f"{w}x{h}" for w, h in SIZES),
+                        help="comma separated visible WIDTHxHEIGHT sizes")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help="comma separated scenarios: " + ', '.join(SCENARIOS))
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help="comma separated engines: " + ', '.join(ENGINES))
+    parser.add_argument('--ticks', type=int, default=400, help="ticks per run")
+    parser.add_argument('--seeds', type=int, default=3, help="seeded runs per engine")
+    parser.add_argument('--sample-every', type=int, default=10, help="ticks between samples")
+    parser.add_argument('--height-tolerance', type=float, default=2.0,
+                        help="mean accumulation height difference allowed, in rows")
+    parser.add_argument('--population-tolerance', type=float, default=0.25,
+                        help="relative population difference allowed")
+    parser.add_argument('--min-population', type=float, default=50,
+                        help="population below which differences are taken as absolute")
+    parser.add_argument('--ks-tolerance', type=float, default=0.15,
+                        help="largest fall time KS statistic allowed for large samples")
+    parser.add_argument('--baseline', help="JSON results to check throughput and observables against")
+    parser.add_argument('--slowdown', type=float, default=0.25,
+                        help="relative throughput loss against the baseline allowed")
+    parser.add_argument('--save', help="write the results as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the suite and return the exit status."""
+    args = parse_args(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    scenarios = args.scenarios.split(',')
+    engines = args.engines.split(',')
+    if REFERENCE not in engines:
+        engines.insert(0, REFERENCE)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    print(f"Checking against the {REFERENCE} engine"
+          + (f" and {args.baseline}" if args.baseline else " (pass --baseline to check against a saved run)"))
+    results = {}
+    failed = False
+    for size in sizes:
+        for scenario in scenarios:
+            print(f"{size[0]}x{size[1]} {scenario}")
+            summaries = {}
+            for engine in engines:
+                runs = [run_simulation(size, SCENARIOS[scenario], seed, args.ticks,
+                                       args.sample_every, ENGINES[engine])
+                        for seed in range(args.seeds)]
+                summaries[engine] = summarize(runs)
+
+            reference = summaries[REFERENCE]
+            for engine, summary in summaries.items():
+                key = f"{size[0]}x{size[1]}/{scenario}/{engine}"
+                failures = [] if engine == REFERENCE else compare(summary, reference, args)
+                failures += check_baseline(key, summary, baseline, args)
+                failed = failed or bool(failures)
+
+                speedup = summary['ticks_per_second'] / reference['ticks_per_second']
+                populations = ' '.join(f"{name}={value:.0f}"
+                                       for name, value in summary['populations'].items())
+                print(f"  {engine:<11} {summary['ticks_per_second']:8.1f} ticks/s "
+                      f"x{speedup:4.2f}  height={summary['heights'][-1]:.1f}  {populations}  "
+                      f"fall={summary['mean_fall_time']:.1f}  "
+                      + ('FAIL: ' + '; '.join(failures) if failures else 'ok'))
+
+                results[key] = {
+                    'ticks_per_second': summary['ticks_per_second'],
+                    'heights': summary['heights'],
+                    'populations': summary['populations'],
+                    'mean_fall_time': summary['mean_fall_time'],
+                    'height_error': summary.get('height_error'),
+                    'fall_time_ks': summary.get('fall_time_ks'),
+                    'failures': failures,
+                }
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
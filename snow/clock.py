@@ -0,0 +1,37 @@
+"""Fixed-timestep simulation clock for snow simulation."""
+import time
+
+class SimulationClock:
+    def __init__(self, timestep, max_catch_up, time_source=time.monotonic):
+        """Initialize the clock with a fixed timestep in seconds."""
+        self.timestep = timestep
+        self.max_catch_up = max_catch_up  # Most ticks run for one advance
+        self.time_source = time_source
+        self.accumulator = 0.0  # Wall time not yet simulated
+        self.last_time = None
+        self.tick = 0  # Ticks simulated so far
+
+    def reset(self):
+        """Forget elapsed wall time, e.g. after a pause."""
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self):
+        """Add the wall time elapsed since the last call and return the ticks now due."""
+        now = self.time_source()
+        if self.last_time is not None:
+            self.accumulator += now - self.last_time
+        self.last_time = now
+
+        due = int(self.accumulator // self.timestep)
+        if due > self.max_catch_up:
+            # Too far behind to catch up, so drop the backlog instead of spiralling
+            due = self.max_catch_up
+            self.accumulator %= self.timestep
+        else:
+            self.accumulator -= due * self.timestep
+        return due
+
+    def time_until_next(self):
+        """Get the wall time until the next tick is due."""
+        return max(self.timestep - self.accumulator, 0.0)
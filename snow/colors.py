@@ -0,0 +1,102 @@
+"""Color depth negotiation and quantization for snow simulation."""
+import numpy as np
+
+# Supported output color modes, richest first
+COLOR_MODES = ['truecolor', '256', '16', 'mono']
+
+# Channel levels of the xterm 6x6x6 color cube (palette 16-231)
+CUBE_LEVELS = np.array([0, 95, 135, 175, 215, 255])
+
+# Default RGB values of the 16 ANSI colors
+ANSI_COLORS = np.array([
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+])
+
+# Lookup tables are indexed by colors reduced to 5 bits per channel
+LUT_BITS = 5
+
+def detect_color_mode(term):
+    """Pick the richest color mode the terminal reports support for."""
+    colors = term.number_of_colors
+    if colors >= 1 << 24:
+        return 'truecolor'
+    elif colors >= 256:
+        return '256'
+    elif colors >= 8:
+        return '16'
+    return 'mono'
+
+def _lut_colors():
+    """Get the RGB color at the center of every lookup table bucket."""
+    levels = (np.arange(1 << LUT_BITS) << (8 - LUT_BITS)) + (1 << (7 - LUT_BITS))
+    r, g, b = np.meshgrid(levels, levels, levels, indexing='ij')
+    return np.stack([r.ravel(), g.ravel(), b.ravel()], axis=1)
+
+def _nearest(colors, palette):
+    """Get the index of the closest palette color for each color."""
+    distances = ((colors[:, None, :] - palette[None, :, :]) ** 2).sum(axis=2)
+    return np.argmin(distances, axis=1)
+
+def _nearest_256(colors):
+    """Get the closest xterm cube (16-231) or grayscale (232-255) index for each color."""
+    levels = np.abs(colors[:, :, None] - CUBE_LEVELS).argmin(axis=2)
+    cube = 16 + 36 * levels[:, 0] + 6 * levels[:, 1] + levels[:, 2]
+    cube_distance = ((colors - CUBE_LEVELS[levels]) ** 2).sum(axis=1)
+    # The closest gray is the one nearest the channel mean
+    grays = np.clip(np.round((colors.mean(axis=1) - 8) / 10), 0, 23).astype(int)
+    gray_distance = ((colors - (8 + 10 * grays)[:, None]) ** 2).sum(axis=1)
+    return np.where(gray_distance < cube_distance, 232 + grays, cube)
+
+class ColorMap:
+    def __init__(self, mode, term):
+        """Initialize quantization tables for a color mode ('auto' to detect it)."""
+        if mode == 'auto':
+            mode = detect_color_mode(term)
+        if mode not in COLOR_MODES:
+            raise ValueError(f"Unknown color mode: {mode}")
+        self.mode = mode
+        # Escape for the default color, key -1
+        self.default_escape = term.white.encode()
+        if not self.default_escape and mode != 'mono':
+            self.default_escape = b'\x1b[37m'  # Forced color on a terminal blessed won't style
+
+        # Palette index for every lookup table bucket
+        self.lut = None
+        if mode == '256':
+            self.lut = _nearest_256(_lut_colors())
+        elif mode == '16':
+            self.lut = _nearest(_lut_colors(), ANSI_COLORS)
+
+    def quantize(self, colors):
+        """Map an array of 0xRRGGBB colors (-1 for default) to escape keys."""
+        if self.lut is None:
+            if self.mode == 'mono':
+                return np.full_like(colors, -1)
+            return colors
+        shift = 8 - LUT_BITS
+        mask = (1 << LUT_BITS) - 1
+        buckets = ((((colors >> (16 + shift)) & mask) << (2 * LUT_BITS)) |
+                   (((colors >> (8 + shift)) & mask) << LUT_BITS) |
+                   ((colors >> shift) & mask))
+        return np.where(colors < 0, -1, self.lut[buckets])
+
+    def escape(self, key):
+        """Get the escape bytes selecting the color of an escape key."""
+        if key < 0:
+            return self.default_escape
+        if self.mode == 'truecolor':
+            r, g, b = (key >> 16) & 0xff, (key >> 8) & 0xff, key & 0xff
+            return f"\x1b[38;2;{r};{g};{b}m".encode()
+        elif self.mode == '256':
+            return f"\x1b[38;5;{key}m".encode()
+        # 16 colors: normal (30-37) and bright (90-97) foregrounds
+        return f"\x1b[{30 + key if key < 8 else 82 + key}m".encode()
+
+    def keys(self):
+        """Get every escape key of a palette mode, for pre-encoding."""
+        if self.lut is None:
+            return [-1]
+        return [-1] + np.unique(self.lut).tolist()
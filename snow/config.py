@@ -1,5 +1,7 @@
 """Configuration settings for the snow simulation."""
 import os
+from contextlib import contextmanager
+
 import yaml
 import blessed
 
@@ -25,12 +27,44 @@ EMPTY = _config['particles']['empty']
 MELT_CHANCE = _config['physics']['melt_chance']
 MAX_WIND_STRENGTH = _config['physics']['max_wind_strength']
 WIND_RAMP_SPEED = _config['physics']['wind_ramp_speed']
+WIND_TURBULENCE = _config['physics'].get('wind_turbulence', 0.15)
+WIND_SHEAR = _config['physics'].get('wind_shear', 0.4)
+GUST_SPEED = _config['physics'].get('gust_speed', 3.0)
 BASE_MELT_CHANCE = _config['physics']['base_melt_chance']
 GRAVITY_DELAY = _config['physics']['gravity_delay']
+MAX_CATCH_UP_TICKS = _config['physics'].get('max_catch_up_ticks', 5)
+FLAKE_ENGINE = _config['physics'].get('flake_engine', 'vectorized')
+SCHEDULED_MOVEMENT = _config['physics'].get('scheduled_movement', True)
+BASE_SNOW_TIME = _config['physics'].get('base_snow_time', 1000)
+BASE_ICE_TIME = _config['physics'].get('base_ice_time', 2000)
 MAX_SNOWFLAKES_LIMIT = _config['simulation']['max_snowflakes']
 MIN_SPAWN_RATE = _config['simulation']['min_spawn_rate']
 MAX_SPAWN_RATE = _config['simulation']['max_spawn_rate']
 SPAWN_RATE_STEP = _config['simulation']['spawn_rate_step']
+ADAPTIVE_QUALITY = _config['simulation'].get('adaptive_quality', True)
+MIN_QUALITY = _config['simulation'].get('min_quality', 0.25)
+WORLD_SCREENS = max(_config['simulation'].get('world_screens', 1), 1)
+CHUNK_SIZE = _config['simulation'].get('chunk_size', 64)
+# Transition rule thresholds, see rules.py
+_RULE_DEFAULTS = {
+    'compression': {
+        'immediate_adjacent_snow': 3,
+        'surrounded_snow': 2,
+        'free_flakes': 4,
+        'supported_flakes': 3,
+        'surrounded_flakes': 2,
+        'free_time': 15,
+        'supported_time': 8,
+        'surrounded_time': 4,
+    },
+    'packing': {'neighbors': 7, 'depth': 4},
+    'ice': {'neighbors': 8, 'depth': 5},
+}
+RULES = {name: dict(defaults, **_config.get('rules', {}).get(name, {}))
+         for name, defaults in _RULE_DEFAULTS.items()}
+
+FAST_FORWARD_TICKS = _config['simulation'].get('fast_forward_ticks', 1200)
+SNAPSHOT_DIR = _config['simulation'].get('snapshot_dir', '~/.cache/snow')
 
 # Visual settings
 import colorsys
@@ -102,6 +136,12 @@ def _generate_background_color(color_method, rel_x=0.0, rel_y=0.0):
     return 0xffffff  # Default to white if method is invalid
 
 
+# Delay between rendered frames (seconds)
+FRAME_DELAY = _config['visual'].get('frame_delay', 0.01)
+
+# Output color depth: auto, truecolor, 256, 16 or mono
+COLOR_MODE = str(_config['visual'].get('color_mode', 'auto'))
+
 # Load sprites from config
 SPRITES = _config.get('sprites', {})
 
@@ -178,18 +218,30 @@ SNOW_MASSES = [char_data[1] for char_data in _config['visual']['snow_chars']]
 SNOW_CHAR = _config['visual']['snow_char']
 PACKED_SNOW_CHAR = _config['visual']['packed_snow_char']
 ICE_CHAR = _config['visual']['ice_char']
+# Every particle glyph; display id -1 - i stands for PARTICLE_GLYPHS[i]
+PARTICLE_GLYPHS = SNOW_CHARS + [SNOW_CHAR, PACKED_SNOW_CHAR, ICE_CHAR]
+
+# Mouse brush settings
+BRUSH = _config.get('brush', {})
+BRUSH_RADIUS = BRUSH.get('radius', 3)
+BRUSH_SHAPE = BRUSH.get('shape', 'square')
 
 # Default simulation state
 DEFAULT_STATE = _config['simulation']['default_state']
 
-def get_dimensions():
-    """Get current grid dimensions based on terminal size."""
-    visible_width = term.width
+def get_dimensions(visible_width=None, visible_height=None):
+    """Get grid dimensions for the terminal size, or for a given visible size."""
+    if visible_width is None:
+        visible_width = term.width
+    if visible_height is None:
+        visible_height = term.height
     width = int(visible_width * 2.0)  # Extend simulation 50% on each side
-    height = term.height - 3  # Account for instructions and bottom padding
+    height = visible_height - 3  # Account for instructions and bottom padding
     visible_start = int(visible_width * 0.5)  # Where visible portion starts
     floor_width = int(visible_width * 1.5)  # Floor extends 25% on each side
     floor_start = int(visible_width * 0.25)  # Where floor starts
+    # The world holds more screens beside the first, with the floor running under all of them
+    world_width = width + int(visible_width * (WORLD_SCREENS - 1))
     
     return {
         'width': width,
@@ -197,5 +249,40 @@ def get_dimensions():
         'visible_width': visible_width,
         'visible_start': visible_start,
         'floor_width': floor_width,
-        'floor_start': floor_start
+        'floor_start': floor_start,
+        'world_width': world_width,
+        'world_floor_width': floor_width + world_width - width,
     }
+
+# config.yaml keys whose constant is not simply the upper-cased key
+_SETTING_ALIASES = {
+    'MAX_SNOWFLAKES': 'MAX_SNOWFLAKES_LIMIT',
+}
+
+# Settings other modules build tables from when imported, so overriding them later has no effect
+_FIXED_SETTINGS = {
+    'SNOW_FLAKES', 'SNOW', 'PACKED_SNOW', 'ICE', 'EMPTY',
+    'SNOW_CHARS', 'SNOW_CHAR', 'PACKED_SNOW_CHAR', 'ICE_CHAR', 'PARTICLE_GLYPHS',
+    'SPRITES', 'BACKGROUND_IMAGES', 'BRUSH',
+}
+
+def setting_name(key):
+    """Get the constant for a setting given as a constant or config.yaml key."""
+    name = key.upper()
+    name = _SETTING_ALIASES.get(name, name)
+    if not name.isupper() or name not in globals():
+        raise KeyError(f"Unknown setting: {key}")
+    if name in _FIXED_SETTINGS:
+        raise KeyError(f"Setting {key} is fixed at import and can't be overridden")
+    return name
+
+@contextmanager
+def overrides(values):
+    """Temporarily replace settings, given by constant or config.yaml key."""
+    values = {setting_name(key): value for key, value in values.items()}
+    saved = {name: globals()[name] for name in values}
+    globals().update(values)
+    try:
+        yield
+    finally:
+        globals().update(saved)
@@ -0,0 +1,61 @@
+"""Airborne snowflake particles for the snow simulation."""
+import numpy as np
+
+class Flakes:
+    # Per-flake fields and their dtypes, stored as one array each
+    FIELDS = {
+        'y': int,
+        'x': int,
+        'char': int,       # Index into config.SNOW_CHARS
+        'color': int,
+        'speed': float,    # Fraction of a cell fallen per tick
+        'progress': float, # Fall progress accumulated towards the next move
+        'birth': int,      # Tick the flake was spawned
+    }
+
+    def __init__(self, capacity=256):
+        """Initialize an empty structure-of-arrays list of snowflakes."""
+        self.count = 0
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        """Get the number of live flakes."""
+        return self.count
+
+    def live(self, name):
+        """Get a view of a field for the live flakes."""
+        return getattr(self, name)[:self.count]
+
+    def add(self, **values):
+        """Append a flake and return its index."""
+        if self.count == len(self.y):
+            # Grow every field together
+            for name in self.FIELDS:
+                field = getattr(self, name)
+                setattr(self, name, np.concatenate([field, np.zeros_like(field)]))
+        index = self.count
+        for name in self.FIELDS:
+            getattr(self, name)[index] = values.get(name, 0)
+        self.count += 1
+        return index
+
+    def remove(self, indices):
+        """Remove the flakes at the given indices, keeping the rest in order."""
+        keep = np.ones(self.count, dtype=bool)
+        keep[indices] = False
+        kept = int(np.count_nonzero(keep))
+        for name in self.FIELDS:
+            field = getattr(self, name)
+            field[:kept] = field[:self.count][keep]
+        self.count = kept
+
+    def load(self, **fields):
+        """Replace every flake with the flakes in the given field arrays."""
+        count = len(fields['y'])
+        capacity = max(len(self.y), count)
+        for name, dtype in self.FIELDS.items():
+            field = np.zeros(capacity, dtype=dtype)
+            field[:count] = fields[name]
+            setattr(self, name, field)
+        self.count = count
@@ -0,0 +1,88 @@
+"""Byte-level frame encoder for snow simulation."""
+import os
+
+import numpy as np
+
+from . import config
+from .colors import ColorMap
+
+# Longest bytes a cell can take: a color escape and a 4-byte UTF-8 glyph
+MAX_ESCAPE_BYTES = 24
+MAX_CELL_BYTES = MAX_ESCAPE_BYTES + 4
+
+class FrameEncoder:
+    def __init__(self, term):
+        """Initialize the encoder with pre-encoded glyphs and color escapes."""
+        self.term = term
+        self.home = term.home.encode()
+        # Display id -> UTF-8 bytes, see Grid.get_display_frame; pre-encoded for the
+        # particles, printable ASCII (the status line) and, by preload, the background
+        self.glyphs = {-1 - i: char.encode() for i, char in enumerate(config.PARTICLE_GLYPHS)}
+        self.glyphs.update((code, chr(code).encode()) for code in range(32, 127))
+        # Colors are quantized to escape keys for the terminal's color mode
+        self.colors = ColorMap(config.COLOR_MODE, term)
+        # Escape key -> escape bytes, pre-encoded for the whole palette where there is one,
+        # the status line and, by preload, the background. Truecolor flake colors are
+        # nearly all distinct, so other keys are encoded per frame rather than kept.
+        self.escapes = {key: self.colors.escape(key) for key in self.colors.keys()}
+        self.preload_colors([config.STATUS_DISPLAY['color']])
+        # Frame bytes, reused between frames and grown as needed
+        self.buffer = bytearray(4096)
+        self.length = 0
+
+    def preload(self, grid):
+        """Pre-encode the background glyphs and colors already on the grid."""
+        for code in np.unique(grid.background).tolist():
+            if code:
+                self.glyphs[code] = chr(code).encode()
+        self.preload_colors(grid.background_colors)
+
+    def preload_colors(self, colors):
+        """Pre-encode the escapes of some 0xRRGGBB colors."""
+        for key in np.unique(self.colors.quantize(np.asarray(colors))).tolist():
+            self.escapes[key] = self.colors.escape(key)
+
+    def glyph(self, display_id):
+        """Get the bytes of a display id, pre-encoded or encoded for this use only."""
+        data = self.glyphs.get(display_id)
+        return chr(display_id).encode() if data is None else data
+
+    def escape(self, key):
+        """Get the escape bytes of an escape key, pre-encoded or encoded for this use only."""
+        data = self.escapes.get(key)
+        return self.colors.escape(key) if data is None else data
+
+    def encode(self, glyphs, colors):
+        """Encode a frame of display ids and colors into the buffer."""
+        keys = self.colors.quantize(colors)
+        rows, columns = glyphs.shape
+        needed = len(self.home) + rows * (columns * MAX_CELL_BYTES + 1)
+        if len(self.buffer) < needed:
+            self.buffer = bytearray(needed)
+
+        buffer = self.buffer
+        glyph_bytes = self.glyphs
+        escapes = self.escapes
+        end = len(self.home)
+        buffer[:end] = self.home
+        last_key = None
+        for glyph_row, key_row in zip(glyphs.tolist(), keys.tolist()):
+            for display_id, key in zip(glyph_row, key_row):
+                # Only switch color when it changes along the frame
+                if key != last_key:
+                    data = escapes.get(key) or self.escape(key)
+                    start, end = end, end + len(data)
+                    buffer[start:end] = data
+                    last_key = key
+                data = glyph_bytes.get(display_id) or self.glyph(display_id)
+                start, end = end, end + len(data)
+                buffer[start:end] = data
+            buffer[end] = 10  # Newline
+            end += 1
+        self.length = end
+
+    def flush(self, fd):
+        """Write the encoded frame to a file descriptor."""
+        view = memoryview(self.buffer)[:self.length]
+        while view:
+            view = view[os.write(fd, view):]
@@ -0,0 +1,52 @@
+"""Adaptive quality governor for snow simulation."""
+import math
+
+from . import config
+
+# Smoothing weight of each new tick cost in the running average
+COST_SMOOTHING = 0.05
+# Drop quality above this fraction of the tick budget, leaving room to draw
+HIGH_LOAD = 0.6
+# Raise quality again below this fraction
+LOW_LOAD = 0.3
+# Quality changed per adjustment, and the ticks to wait before the next one
+QUALITY_STEP = 0.125
+SETTLE_TICKS = 30
+
+class QualityGovernor:
+    def __init__(self, budget, min_quality=None, enabled=None):
+        """Initialize the governor for a tick budget in seconds, by default configured from config."""
+        self.budget = budget
+        self.min_quality = config.MIN_QUALITY if min_quality is None else min_quality
+        self.enabled = config.ADAPTIVE_QUALITY if enabled is None else enabled
+        self.quality = 1.0  # Fraction of full quality, see apply
+        self.cost = 0.0  # Smoothed seconds per tick
+        self.settle_ticks = SETTLE_TICKS  # Ticks until the next adjustment
+
+    def record(self, seconds):
+        """Record the cost of a tick and return True if the quality changed."""
+        self.cost += (seconds - self.cost) * COST_SMOOTHING
+        if not self.enabled or self.settle_ticks > 0:
+            self.settle_ticks -= 1
+            return False
+
+        load = self.cost / self.budget
+        if load > HIGH_LOAD and self.quality > self.min_quality:
+            quality = max(self.quality - QUALITY_STEP, self.min_quality)
+        elif load < LOW_LOAD and self.quality < 1.0:
+            quality = min(self.quality + QUALITY_STEP, 1.0)
+        else:
+            return False
+        self.quality = quality
+        self.settle_ticks = SETTLE_TICKS  # Let the average catch up with the change
+        return True
+
+    def apply(self, grid, physics):
+        """Scale the load-dependent settings of the grid and physics to the quality."""
+        stretch = math.ceil(1 / self.quality)
+        grid.max_flakes = int(config.MAX_SNOWFLAKES_LIMIT * self.quality)
+        grid.spawn_scale = self.quality
+        # Margin columns beyond the trimmed width stay frozen until quality returns
+        margin = (grid.width - grid.visible_width) // 2
+        physics.margin_width = None if self.quality >= 1.0 else round(margin * self.quality)
+        physics.backoff_interval = stretch
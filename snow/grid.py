@@ -2,25 +2,38 @@
 import numpy as np
 import random
 from . import config
+from .flakes import Flakes
+from .world import ChunkStore
 
 class Grid:
-    def __init__(self):
-        """Initialize the grid with current terminal dimensions."""
-        dims = config.get_dimensions()
+    def __init__(self, size=None):
+        """Initialize the grid with current terminal dimensions, or a (width, height) size."""
+        self.size = size  # Fixed visible size, or None to follow the terminal
+        dims = config.get_dimensions(*(size or ()))
         self.width = dims['width']
         self.height = dims['height']
         self.visible_width = dims['visible_width']
         self.visible_start = dims['visible_start']
-        self.floor_width = dims['floor_width']
-        self.floor_start = dims['floor_start']
+        # The grid is a window onto a world that may be wider, see scroll
+        self.world_width = dims['world_width']
+        self.world_floor_start = dims['floor_start']
+        self.world_floor_width = dims['world_floor_width']
+        self.world_offset = (self.world_width - self.width) // 2  # World column of grid column 0
+        # Settled particles of the world outside the window
+        self.chunks = ChunkStore(self.height)
+        self.update_floor()
         
         # Initialize grid arrays
         self.grid = np.zeros((self.height, self.width), dtype=int)
-        self.snowflake_chars = np.zeros((self.height, self.width), dtype=int)
-        self.snowflake_speeds = np.ones((self.height, self.width), dtype=float)
-        self.snowflake_colors = np.zeros((self.height, self.width), dtype=int)
         self.stationary_time = np.zeros((self.height, self.width), dtype=int)
-        self.flake_existence_time = np.zeros((self.height, self.width), dtype=int)
+        # Airborne snowflakes live in a particle list; the grid marks their cells
+        self.flakes = Flakes()
+        # Flake limit and share of spawn positions tried, lowered by the quality governor
+        self.max_flakes = config.MAX_SNOWFLAKES_LIMIT
+        self.spawn_scale = 1.0
+        self.flake_index = np.full((self.height, self.width), -1, dtype=int)
+        # Birth ticks of flakes that settled, collected only when set to a list
+        self.settle_log = None
         # Background layer
         self.background = np.zeros((self.height, self.width), dtype=int)
         self.background_colors = np.zeros((self.height, self.width), dtype=int)
@@ -31,80 +44,236 @@ class Grid:
 
     def update_dimensions(self):
         """Update grid dimensions based on terminal size."""
-        dims = config.get_dimensions()
+        dims = config.get_dimensions(*(self.size or ()))
         new_width = dims['width']
         new_height = dims['height']
         
         if new_width != self.width or new_height != self.height:
-            new_grid = np.zeros((new_height, new_width), dtype=int)
-            new_chars = np.zeros((new_height, new_width), dtype=int)
-            new_speeds = np.ones((new_height, new_width), dtype=float)
-            new_colors = np.zeros((new_height, new_width), dtype=int)
-            new_stationary = np.zeros((new_height, new_width), dtype=int)
-            new_existence = np.zeros((new_height, new_width), dtype=int)
             new_background = np.zeros((new_height, new_width), dtype=int)
             new_bg_colors = np.zeros((new_height, new_width), dtype=int)
             new_bg_z = np.full((new_height, new_width), 255, dtype=int)
             
-            # Copy existing snow within new bounds
+            # Copy existing background within new bounds
             copy_height = min(self.height, new_height)
             copy_width = min(self.width, new_width)
-            new_grid[:copy_height, :copy_width] = self.grid[:copy_height, :copy_width]
-            new_chars[:copy_height, :copy_width] = self.snowflake_chars[:copy_height, :copy_width]
-            new_speeds[:copy_height, :copy_width] = self.snowflake_speeds[:copy_height, :copy_width]
-            new_colors[:copy_height, :copy_width] = self.snowflake_colors[:copy_height, :copy_width]
             new_background[:copy_height, :copy_width] = self.background[:copy_height, :copy_width]
             new_bg_colors[:copy_height, :copy_width] = self.background_colors[:copy_height, :copy_width]
             new_bg_z[:copy_height, :copy_width] = self.background_z[:copy_height, :copy_width]
             
+            keep_world = new_height == self.height
+            if keep_world:
+                # Only the width changed: keep the stored world and the window's place in it
+                self.park_window()
+                if dims['world_width'] < self.world_width:
+                    # Release what fell off the end of a narrower world
+                    self.chunks.take(dims['world_width'], self.world_width - dims['world_width'])
+                offset = min(self.world_offset, dims['world_width'] - new_width)
+            else:
+                # Stored chunks don't line up with the new rows, so the world restarts around the window
+                self.chunks = ChunkStore(new_height)
+                offset = (dims['world_width'] - new_width) // 2
+                new_grid = np.zeros((new_height, new_width), dtype=int)
+                new_stationary = np.zeros((new_height, new_width), dtype=int)
+                new_grid[:copy_height, :copy_width] = self.grid[:copy_height, :copy_width]
+            
             # Update dimensions and arrays
             self.width = new_width
             self.height = new_height
             self.visible_width = dims['visible_width']
             self.visible_start = dims['visible_start']
-            self.floor_width = dims['floor_width']
-            self.floor_start = dims['floor_start']
-            self.grid = new_grid
-            self.snowflake_chars = new_chars
-            self.snowflake_speeds = new_speeds
-            self.snowflake_colors = new_colors
-            self.stationary_time = new_stationary
-            self.flake_existence_time = new_existence
+            self.world_width = dims['world_width']
+            self.world_floor_start = dims['floor_start']
+            self.world_floor_width = dims['world_floor_width']
             self.background = new_background
             self.background_colors = new_bg_colors
             self.background_z = new_bg_z
+            
+            if keep_world:
+                self.load_window(offset)
+                return
+            self.world_offset = offset
+            self.update_floor()
+            self.grid = new_grid
+            self.stationary_time = new_stationary
+            self.flake_index = np.full((new_height, new_width), -1, dtype=int)
+            
+            # Drop flakes that no longer fit
+            ys, xs = self.flakes.live('y'), self.flakes.live('x')
+            self.flakes.remove(np.flatnonzero((ys >= new_height) | (xs >= new_width)))
+            self.index_flakes()
+
+    def update_floor(self):
+        """Place the part of the world's floor that lies under the window."""
+        start = max(self.world_floor_start - self.world_offset, 0)
+        end = min(self.world_floor_start + self.world_floor_width - self.world_offset, self.width)
+        self.floor_start = start
+        self.floor_width = max(end - start, 0)
+
+    def scroll(self, dx):
+        """Pan the window dx columns across the world and return True if it moved.
+
+        Settled particles leaving the window are parked in the chunk store and
+        frozen until it comes back; airborne flakes that leave are lost.
+        """
+        offset = min(max(self.world_offset + dx, 0), self.world_width - self.width)
+        if offset == self.world_offset:
+            return False
+        self.park_window()
+        self.load_window(offset)
+        return True
+
+    def park_window(self):
+        """Store the window's settled particles in the chunk store."""
+        settled = np.where(self.grid == config.SNOW_FLAKES, config.EMPTY, self.grid)
+        self.chunks.write(self.world_offset, settled, self.stationary_time)
+
+    def load_window(self, offset):
+        """Take a window of the current width at a world offset out of the chunk store."""
+        dx = offset - self.world_offset
+        self.world_offset = offset
+        self.grid, self.stationary_time = self.chunks.take(offset, self.width)
+        self.flake_index = np.full((self.height, self.width), -1, dtype=int)
+        self.update_floor()
+        
+        # Carry the flakes along, dropping those outside or inside settled snow
+        xs = self.flakes.live('x')
+        xs -= dx
+        ys = self.flakes.live('y')
+        inside = np.flatnonzero((xs >= 0) & (xs < self.width))
+        keep = np.zeros(len(xs), dtype=bool)
+        keep[inside] = self.grid[ys[inside], xs[inside]] == config.EMPTY
+        self.flakes.remove(np.flatnonzero(~keep))
+        self.index_flakes()
 
-    def spawn_snowflakes(self, snowing, current_spawn_rate):
+    def spawn_snowflakes(self, snowing, current_spawn_rate, tick=0):
         """Spawn new snowflakes at the top of the screen."""
-        if not snowing or np.sum(self.grid == config.SNOW_FLAKES) >= config.MAX_SNOWFLAKES_LIMIT:
+        if not snowing or self.flake_count >= self.max_flakes:
             return
             
         # Try to spawn across more positions, but only in the visible area
         spawn_positions = random.sample(
             range(self.visible_start, self.visible_start + self.visible_width), 
-            max(3, self.visible_width // 5)
+            max(3, round(self.visible_width // 5 * self.spawn_scale))
         )
         
         for x in spawn_positions:
             if self.grid[0, x] == config.EMPTY:  # Always try to spawn if empty
                 if random.random() < current_spawn_rate:
-                    self.grid[0, x] = config.SNOW_FLAKES
-                    self.snowflake_chars[0, x] = random.randint(0, len(config.SNOW_CHARS)-1)
-                    self.snowflake_speeds[0, x] = random.uniform(0.3, 0.7)  # Keep speeds consistently light
-                    # Generate color using active color scheme
-                    self.snowflake_colors[0, x] = config.generate_snowflake_color()
-                    self.flake_existence_time[0, x] = 0  # Reset existence time for new flake
-
-    def clear_offscreen_bottom(self):
-        """Clear bottom rows outside visible area if grid is nearly full."""
-        if np.sum(self.grid == config.SNOW_FLAKES) >= config.MAX_SNOWFLAKES_LIMIT * 0.95:  # 95% full
-            # Clear bottom row only outside visible area
-            for x in range(self.width):
-                if x < self.visible_start or x >= self.visible_start + self.visible_width:
-                    self.grid[-1, x] = config.EMPTY
-                    self.snowflake_chars[-1, x] = 0
-                    self.snowflake_speeds[-1, x] = 1.0
-                    self.snowflake_colors[-1, x] = 0
+                    self.add_flake(
+                        0, x,
+                        char=random.randint(0, len(config.SNOW_CHARS)-1),
+                        speed=random.uniform(0.3, 0.7),  # Keep speeds consistently light
+                        # Generate color using active color scheme
+                        color=config.generate_snowflake_color(),
+                        birth=tick  # Existence time counts from here
+                    )
+
+    @property
+    def flake_count(self):
+        """Get the number of live snowflakes."""
+        return self.flakes.count
+
+    def add_flake(self, y, x, **values):
+        """Add a snowflake at an empty position."""
+        self.grid[y, x] = config.SNOW_FLAKES
+        self.flake_index[y, x] = self.flakes.add(y=y, x=x, **values)
+
+    def index_flakes(self):
+        """Point the flake index and grid at every live flake's cell."""
+        ys, xs = self.flakes.live('y'), self.flakes.live('x')
+        self.flake_index[ys, xs] = np.arange(self.flakes.count)
+        self.grid[ys, xs] = config.SNOW_FLAKES
+
+    def snapshot(self):
+        """Get copies of the arrays holding the particle state."""
+        data = {
+            'grid': self.grid.copy(),
+            'stationary_time': self.stationary_time.copy(),
+        }
+        for name in Flakes.FIELDS:
+            data['flake_' + name] = self.flakes.live(name).copy()
+        data['world_offset'] = np.array(self.world_offset)
+        data.update(self.chunks.snapshot())
+        return data
+
+    def restore(self, data):
+        """Restore the particle state from a snapshot of a grid the same size.
+
+        Raises KeyError or ValueError for a snapshot that doesn't fit, leaving
+        the grid untouched.
+        """
+        # Check and gather everything before changing anything
+        grid, stationary = data['grid'], data['stationary_time']
+        if grid.shape != self.grid.shape or stationary.shape != self.grid.shape:
+            raise ValueError(f"Snapshot is {grid.shape}, grid is {self.grid.shape}")
+        fields = {name: data['flake_' + name] for name in Flakes.FIELDS}
+        ys, xs = fields['y'], fields['x']
+        if len({len(field) for field in fields.values()}) > 1:
+            raise ValueError("Snapshot flake fields differ in length")
+        if len(ys) and (ys.min() < 0 or ys.max() >= self.height or
+                        xs.min() < 0 or xs.max() >= self.width):
+            raise ValueError("Snapshot flakes lie outside the grid")
+        world_offset = int(data['world_offset'])
+        if not 0 <= world_offset <= self.world_width - self.width:
+            raise ValueError(f"Snapshot world offset {world_offset} is outside the world")
+        chunks = ChunkStore(self.height)
+        chunks.restore(data)
+        
+        self.chunks = chunks
+        self.world_offset = world_offset
+        self.update_floor()
+        self.grid[:] = grid
+        self.stationary_time[:] = stationary
+        self.flakes.load(**fields)
+        self.flake_index[:] = -1
+        self.index_flakes()
+
+    def drop_flakes(self, indices, value=config.EMPTY):
+        """Take flakes out of the particle list, leaving the given type in their cells."""
+        indices = np.asarray(indices, dtype=int)
+        if not len(indices):
+            return
+        ys, xs = self.flakes.y[indices], self.flakes.x[indices]
+        self.grid[ys, xs] = value
+        self.flake_index[ys, xs] = -1
+        if value == config.EMPTY:
+            self.stationary_time[ys, xs] = 0
+        elif self.settle_log is not None:
+            self.settle_log.extend(self.flakes.birth[indices].tolist())
+        self.flakes.remove(indices)
+        self.index_flakes()
+
+    def move_flakes(self, indices, to_ys, to_xs):
+        """Move flakes to empty cells, resetting their stationary time."""
+        indices = np.asarray(indices, dtype=int)
+        ys, xs = self.flakes.y[indices], self.flakes.x[indices]
+        self.grid[ys, xs] = config.EMPTY
+        self.flake_index[ys, xs] = -1
+        self.stationary_time[ys, xs] = 0
+        self.grid[to_ys, to_xs] = config.SNOW_FLAKES
+        self.flake_index[to_ys, to_xs] = indices
+        self.flakes.y[indices] = to_ys
+        self.flakes.x[indices] = to_xs
+
+    def evict_flakes(self, tick):
+        """Retire the oldest and most stuck off-screen snowflakes when nearly at the limit."""
+        limit = self.max_flakes
+        if self.flake_count < limit * 0.95:  # 95% full
+            return
+            
+        # Only off-screen flakes are retired, so nothing vanishes in view
+        xs = self.flakes.live('x')
+        offscreen = np.flatnonzero((xs < self.visible_start) |
+                                   (xs >= self.visible_start + self.visible_width))
+        
+        # Ticks spent stuck count double towards a flake's age
+        ys, xs = self.flakes.y[offscreen], self.flakes.x[offscreen]
+        age = tick - self.flakes.birth[offscreen] + self.stationary_time[ys, xs]
+        excess = min(self.flake_count - int(limit * 0.9), len(age))
+        if excess <= 0:
+            return
+        oldest = np.argpartition(-age, excess - 1)[:excess]
+        self.drop_flakes(offscreen[oldest])
 
     def is_at_floor(self, y, x):
         """Check if the given position is at the floor."""
@@ -112,6 +281,13 @@ class Grid:
                 x >= self.floor_start and 
                 x < self.floor_start + self.floor_width)
 
+    def floor_mask(self):
+        """Get a boolean map of the cells that are at the floor."""
+        mask = np.zeros((self.height, self.width), dtype=bool)
+        if self.height >= 2:
+            mask[self.height-2, self.floor_start:self.floor_start + self.floor_width] = True
+        return mask
+
     def get_cell(self, y, x):
         """Get the type of particle at the given position."""
         if 0 <= y < self.height and 0 <= x < self.width:
@@ -121,25 +297,119 @@ class Grid:
     def set_cell(self, y, x, value):
         """Set a cell to a specific value and reset its properties."""
         if 0 <= y < self.height and 0 <= x < self.width:
+            if self.grid[y, x] == config.SNOW_FLAKES:
+                if value == config.SNOW_FLAKES:
+                    return
+                # Flake settles or melts, leaving the particle list
+                self.drop_flakes([self.flake_index[y, x]], value)
+                return
+            if value == config.SNOW_FLAKES:
+                self.add_flake(y, x, speed=1.0)
+                return
             self.grid[y, x] = value
             if value == config.EMPTY:
-                self.snowflake_chars[y, x] = 0
-                self.snowflake_speeds[y, x] = 1.0
-                self.snowflake_colors[y, x] = 0
                 self.stationary_time[y, x] = 0
-                self.flake_existence_time[y, x] = 0
 
     def move_cell(self, from_y, from_x, to_y, to_x):
         """Move a cell from one position to another."""
         if (0 <= from_y < self.height and 0 <= from_x < self.width and
             0 <= to_y < self.height and 0 <= to_x < self.width):
+            if self.grid[from_y, from_x] == config.SNOW_FLAKES:
+                self.move_flakes([self.flake_index[from_y, from_x]], [to_y], [to_x])
+                return
             self.grid[to_y, to_x] = self.grid[from_y, from_x]
-            self.snowflake_chars[to_y, to_x] = self.snowflake_chars[from_y, from_x]
-            self.snowflake_speeds[to_y, to_x] = self.snowflake_speeds[from_y, from_x]
-            self.snowflake_colors[to_y, to_x] = self.snowflake_colors[from_y, from_x]
-            self.flake_existence_time[to_y, to_x] = self.flake_existence_time[from_y, from_x]
             self.set_cell(from_y, from_x, config.EMPTY)
 
+    def clear_cells(self, ys, xs):
+        """Empty the cells at the given index arrays and reset their properties."""
+        flakes = self.flake_index[ys, xs]
+        self.drop_flakes(flakes[flakes >= 0])
+        self.grid[ys, xs] = config.EMPTY
+        self.stationary_time[ys, xs] = 0
+
+    def move_cells(self, from_ys, from_xs, to_ys, to_xs):
+        """Move the cells at the given index arrays to empty target cells."""
+        flakes = self.flake_index[from_ys, from_xs]
+        is_flake = flakes >= 0
+        self.move_flakes(flakes[is_flake], to_ys[is_flake], to_xs[is_flake])
+        
+        # Settled particles only need their type carried over
+        settled = ~is_flake
+        from_ys, from_xs = from_ys[settled], from_xs[settled]
+        self.grid[to_ys[settled], to_xs[settled]] = self.grid[from_ys, from_xs]
+        self.clear_cells(from_ys, from_xs)
+
+    def brush_cells(self, y, x, radius=None, shape=None):
+        """Get the index arrays of the visible cells covered by a brush at the given position."""
+        radius = config.BRUSH_RADIUS if radius is None else radius
+        shape = config.BRUSH_SHAPE if shape is None else shape
+
+        # Clip the brush to the grid height and the visible columns
+        top, bottom = max(y - radius, 0), min(y + radius + 1, self.height)
+        left = max(x - radius, self.visible_start)
+        right = min(x + radius + 1, self.visible_start + self.visible_width)
+        if top >= bottom or left >= right:
+            return np.empty(0, dtype=int), np.empty(0, dtype=int)
+
+        ys, xs = np.mgrid[top:bottom, left:right]
+        if shape == 'circle':
+            inside = (ys - y) ** 2 + (xs - x) ** 2 <= (radius + 0.5) ** 2
+            ys, xs = ys[inside], xs[inside]
+        return ys.ravel(), xs.ravel()
+
+    def fill_brush(self, y, x, value=config.SNOW, radius=None, shape=None):
+        """Fill the empty cells under a brush with the given particle type."""
+        ys, xs = self.brush_cells(y, x, radius, shape)
+        empty = self.grid[ys, xs] == config.EMPTY
+        if value == config.SNOW_FLAKES:
+            for fill_y, fill_x in zip(ys[empty], xs[empty]):
+                self.set_cell(fill_y, fill_x, value)
+            return
+        self.grid[ys[empty], xs[empty]] = value
+
+    def erase_brush(self, y, x, radius=None, shape=None,
+                    types=(config.SNOW, config.PACKED_SNOW, config.ICE)):
+        """Erase particles of the given types under a brush."""
+        ys, xs = self.brush_cells(y, x, radius, shape)
+        erase = np.isin(self.grid[ys, xs], types)
+        self.clear_cells(ys[erase], xs[erase])
+
+    def push_brush(self, from_y, from_x, to_y, to_x, radius=None, shape=None):
+        """Sweep a brush from one position to another, pushing particles along the stroke."""
+        move_dy, move_dx = to_y - from_y, to_x - from_x
+        magnitude = (move_dx * move_dx + move_dy * move_dy) ** 0.5
+        if magnitude == 0:
+            return
+
+        # Particles move one cell per step in the rounded stroke direction
+        step_y = int(round(move_dy / magnitude))
+        step_x = int(round(move_dx / magnitude))
+        steps = max(abs(move_dy), abs(move_dx))
+        movable = (config.SNOW, config.PACKED_SNOW, config.ICE, config.SNOW_FLAKES)
+
+        for step in range(1, steps + 1):
+            # Brush center advances along the stroke
+            y = from_y + int(round(move_dy * step / steps))
+            x = from_x + int(round(move_dx * step / steps))
+            ys, xs = self.brush_cells(y, x, radius, shape)
+            sources = np.isin(self.grid[ys, xs], movable)
+            ys, xs = ys[sources], xs[sources]
+
+            # Only push into empty, visible cells
+            to_ys, to_xs = ys + step_y, xs + step_x
+            valid = ((to_ys >= 0) & (to_ys < self.height) &
+                     (to_xs >= self.visible_start) &
+                     (to_xs < self.visible_start + self.visible_width))
+            ys, xs, to_ys, to_xs = ys[valid], xs[valid], to_ys[valid], to_xs[valid]
+
+            # Move the leading front first so the particles behind can follow
+            fronts = ys * step_y + xs * step_x
+            for front in np.unique(fronts)[::-1]:
+                sel = fronts == front
+                free = self.grid[to_ys[sel], to_xs[sel]] == config.EMPTY
+                self.move_cells(ys[sel][free], xs[sel][free],
+                                to_ys[sel][free], to_xs[sel][free])
+
     def increment_stationary_time(self, y, x):
         """Increment the stationary time for a cell."""
         if 0 <= y < self.height and 0 <= x < self.width:
@@ -158,8 +428,8 @@ class Grid:
 
     def get_snowflake_char(self, y, x):
         """Get the snowflake character index for a cell."""
-        if 0 <= y < self.height and 0 <= x < self.width:
-            return self.snowflake_chars[y, x]
+        if 0 <= y < self.height and 0 <= x < self.width and self.flake_index[y, x] >= 0:
+            return self.flakes.char[self.flake_index[y, x]]
         return 0
 
     def get_display_char(self, y, x):
@@ -169,9 +439,10 @@ class Grid:
             # Snow particles are at z=127 (middle layer)
             if cell_type != config.EMPTY and self.background_z[y, x] > 127:
                 if cell_type == config.SNOW_FLAKES:
-                    char_idx = self.snowflake_chars[y, x]
+                    index = self.flake_index[y, x]
+                    char_idx = self.flakes.char[index]
                     if 0 <= char_idx < len(config.SNOW_CHARS):
-                        return config.SNOW_CHARS[char_idx], self.snowflake_colors[y, x]
+                        return config.SNOW_CHARS[char_idx], self.flakes.color[index]
                 elif cell_type == config.SNOW:
                     return config.SNOW_CHAR, None
                 elif cell_type == config.PACKED_SNOW:
@@ -183,6 +454,42 @@ class Grid:
                 return chr(self.background[y, x]), self.background_colors[y, x]
         return ' ', None
 
+    def get_display_frame(self, x_start, x_end):
+        """Get display ids and colors for columns x_start to x_end, as get_display_char would.
+
+        Display ids are character codes, or -1 - i for config.PARTICLE_GLYPHS[i];
+        a color of -1 means the default color.
+        """
+        cells = self.grid[:, x_start:x_end]
+        z_order = self.background_z[:, x_start:x_end]
+        background = self.background[:, x_start:x_end]
+        glyphs = np.full(cells.shape, ord(' '), dtype=int)
+        colors = np.full(cells.shape, -1, dtype=int)
+
+        # Background shows through empty cells or in front of the snow layer (z=127)
+        in_front = z_order <= 127
+        shown = (background != 0) & ((cells == config.EMPTY) | in_front)
+        glyphs[shown] = background[shown]
+        colors[shown] = self.background_colors[:, x_start:x_end][shown]
+
+        # Snow particles behind nothing
+        particle_ids = {
+            config.SNOW: -1 - len(config.SNOW_CHARS),
+            config.PACKED_SNOW: -2 - len(config.SNOW_CHARS),
+            config.ICE: -3 - len(config.SNOW_CHARS),
+        }
+        for cell_type, display_id in particle_ids.items():
+            glyphs[(cells == cell_type) & ~in_front] = display_id
+
+        ys, xs = np.nonzero((cells == config.SNOW_FLAKES) & ~in_front)
+        indices = self.flake_index[ys, xs + x_start]
+        chars = self.flakes.char[indices]
+        valid = (chars >= 0) & (chars < len(config.SNOW_CHARS))
+        ys, xs, indices = ys[valid], xs[valid], indices[valid]
+        glyphs[ys, xs] = -1 - chars[valid]
+        colors[ys, xs] = self.flakes.color[indices]
+        return glyphs, colors
+
     def set_background(self, y, x, char, color=None, z_order=255):
         """Set a background character and optionally its color and z-order at the given position."""
         if 0 <= y < self.height and 0 <= x < self.width:
@@ -0,0 +1,141 @@
+"""Terminal input reader for snow simulation."""
+import asyncio
+import codecs
+import os
+from collections import namedtuple
+
+from blessed.keyboard import Keystroke
+
+# Decoded SGR mouse report, in 0-based terminal coordinates
+MouseEvent = namedtuple('MouseEvent', ['button', 'x', 'y', 'is_press'])
+
+# Escape sequences for the keys the simulation responds to
+KEY_SEQUENCES = {
+    '\x1b[A': 'KEY_UP',
+    '\x1b[B': 'KEY_DOWN',
+    '\x1b[C': 'KEY_RIGHT',
+    '\x1b[D': 'KEY_LEFT',
+    '\x1bOA': 'KEY_UP',  # Application cursor mode
+    '\x1bOB': 'KEY_DOWN',
+    '\x1bOC': 'KEY_RIGHT',
+    '\x1bOD': 'KEY_LEFT',
+}
+
+class InputParser:
+    def __init__(self):
+        """Initialize an incremental decoder for keys and SGR mouse sequences."""
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self.buffer = ''
+
+    def feed(self, data):
+        """Decode a chunk of raw input bytes into a list of events."""
+        self.buffer += self.decoder.decode(data)
+        events = []
+        while self.buffer:
+            event, consumed = self.parse_next(self.buffer)
+            if not consumed:
+                break  # Wait for the rest of a partial sequence
+            self.buffer = self.buffer[consumed:]
+            if event is not None:
+                events.append(event)
+        return events
+
+    def flush(self):
+        """Emit whatever is left in the buffer as plain keys (e.g. a lone ESC)."""
+        events = [Keystroke(char) for char in self.buffer]
+        self.buffer = ''
+        return events
+
+    def parse_next(self, text):
+        """Parse the event at the start of text, returning (event, chars consumed)."""
+        if text[0] != '\x1b':
+            return Keystroke(text[0]), 1
+        if len(text) < 2:
+            return None, 0
+
+        # SGR mouse sequence: \x1b[<Cb;Cx;Cy[M|m]
+        if text.startswith('\x1b[<'):
+            for end in range(3, len(text)):
+                if text[end] in 'Mm':
+                    return self.parse_mouse(text[3:end], text[end] == 'M'), end + 1
+                if not (text[end].isdigit() or text[end] == ';'):
+                    return None, end  # Malformed, drop it
+            return None, 0
+
+        # CSI (\x1b[) and SS3 (\x1bO) key sequences end with a final byte
+        if text[1] in '[O':
+            for end in range(2, len(text)):
+                if '\x40' <= text[end] <= '\x7e':
+                    seq = text[:end + 1]
+                    return Keystroke(seq, name=KEY_SEQUENCES.get(seq)), end + 1
+            return None, 0
+
+        # ESC followed by anything else is a lone escape key
+        return Keystroke('\x1b'), 1
+
+    def parse_mouse(self, params, is_press):
+        """Parse the parameters of an SGR mouse sequence."""
+        try:
+            btn, x, y = (int(part) for part in params.split(';'))
+        except ValueError:
+            return None  # Invalid mouse sequence
+        return MouseEvent(btn, x - 1, y - 1, is_press)  # Convert to 0-based
+
+class InputReader:
+    def __init__(self, fd, escape_timeout=0.05):
+        """Initialize an asyncio reader for the terminal file descriptor."""
+        self.fd = fd
+        self.escape_timeout = escape_timeout
+        self.parser = InputParser()
+        self.events = asyncio.Queue()
+        self.loop = None
+        self.flush_handle = None
+
+    def start(self, loop):
+        """Start reading input whenever the descriptor becomes readable."""
+        self.loop = loop
+        loop.add_reader(self.fd, self.on_readable)
+
+    def stop(self):
+        """Stop reading input."""
+        if self.loop is not None:
+            self.loop.remove_reader(self.fd)
+            self.loop = None
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+
+    def on_readable(self):
+        """Read raw bytes in bulk and queue the decoded events."""
+        try:
+            data = os.read(self.fd, 4096)
+        except BlockingIOError:
+            return
+        if not data:
+            self.stop()
+            return
+        self.queue_events(self.parser.feed(data))
+
+        # If nothing more arrives, a pending ESC was a key press
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        if self.parser.buffer:
+            self.flush_handle = self.loop.call_later(self.escape_timeout, self.flush)
+
+    def flush(self):
+        """Emit whatever partial input the parser still holds."""
+        self.flush_handle = None
+        self.queue_events(self.parser.flush())
+
+    def queue_events(self, events):
+        """Put decoded events on the queue."""
+        for event in events:
+            self.events.put_nowait(event)
+
+    async def get_events(self):
+        """Wait for the next event, then return it with every other pending event."""
+        events = [await self.events.get()]
+        while not self.events.empty():
+            events.append(self.events.get_nowait())
+        return events
@@ -1,82 +1,190 @@
 """Main entry point for snow simulation."""
+import argparse
+import asyncio
 import random
 import signal
+import sys
 import time
-from threading import Thread
 
-from . import config
+import numpy as np
+
+from . import config, snapshot
+from .clock import SimulationClock
+from .governor import QualityGovernor
 from .grid import Grid
+from .input import InputReader, MouseEvent
 from .physics import Physics
 from .renderer import Renderer
+from .shm import GridPublisher
+from .stream import FrameServer
+from .viewer import Viewer
 
 class SnowSimulation:
-    def __init__(self):
-        """Initialize the snow simulation."""
-        self.grid = Grid()
+    def __init__(self, size=None, server=None, headless=False, publisher=None):
+        """Initialize the snow simulation, sized to the terminal or a (width, height)."""
+        self.grid = Grid(size)
         self.physics = Physics(self.grid)
         self.renderer = Renderer(self.grid)
+        self.clock = SimulationClock(config.GRAVITY_DELAY, config.MAX_CATCH_UP_TICKS)
+        # Trades detail for speed when ticks overrun their timestep
+        self.governor = QualityGovernor(config.GRAVITY_DELAY)
         self.running = True
+        # Set when the asyncio driver should shut down
+        self.stopped = None
         self.state = config.DEFAULT_STATE.copy()
         # Track last mouse position for movement
         self.last_mouse_x = None
         self.last_mouse_y = None
+        # Latest drag position not yet applied as a stroke
+        self.drag_target = None
         # Track status visibility
         self.show_status = False
+        # Optional FrameServer streaming the view to viewers
+        self.server = server
+        # Optional GridPublisher sharing the grid with other processes
+        self.publisher = publisher
+        # Run without drawing to or reading from the terminal
+        self.headless = headless
+        # Ticks still to run at full speed, see fast_forward
+        self.fast_forward_left = 0
+        self.fast_forward_total = 0
+        self.snapshot_key = None  # Cache the result under this key when done
 
-    def handle_exit(self, signum, frame):
-        """Handle exit gracefully."""
+    def stop(self):
+        """Stop the simulation and let the driver tasks shut down."""
         self.running = False
-        time.sleep(0.1)
-        print(self.renderer.term.normal)
-        exit(0)
+        if self.stopped is not None:
+            self.stopped.set()
 
-    def physics_loop(self):
-        """Continuous physics updates."""
-        while self.running:
-            if self.state['snowing']:
-                self.grid.spawn_snowflakes(self.state['snowing'], 
-                                         self.state['current_spawn_rate'])
-            
-            self.physics.update_wind()
-            # Sync wind strength with state
-            self.state['wind_strength'] = self.physics.wind_strength
-            
-            # Update backoff factor based on snow height
+    def step(self):
+        """Advance the simulation by one fixed timestep."""
+        if self.state['snowing']:
+            self.grid.spawn_snowflakes(self.state['snowing'], 
+                                     self.state['current_spawn_rate'],
+                                     self.clock.tick)
+        
+        self.physics.update_wind()
+        # Sync wind strength with state
+        self.state['wind_strength'] = self.physics.wind_strength
+        
+        # Update backoff factor based on snow height
+        if self.clock.tick % self.physics.backoff_interval == 0:
             self.physics.current_backoff = self.physics.calculate_backoff_factor()
+        
+        # Retire old off-screen flakes if near the limit
+        self.grid.evict_flakes(self.clock.tick)
+        
+        # Precompute neighbor counts consulted by the rule handlers
+        self.physics.update_neighbor_counts()
+        
+        # Columns to simulate, all of them unless the quality governor has trimmed the margins
+        start, end = self.physics.active_columns()
+        
+        # Melt a binomial sample of particles
+        self.physics.apply_melting(self.state['temperature'], (start, end))
+        
+        # Work out which snowflakes are due to fall this tick
+        due = self.physics.update_fall_schedule((start, end))
+        
+        # Airborne flakes advance as whole arrays
+        vectorized = config.FLAKE_ENGINE == 'vectorized'
+        if vectorized:
+            self.physics.update_flakes(due, (start, end))
+        
+        # Settled snow packs and freezes in one pass over the grid
+        if vectorized:
+            self.physics.apply_transitions((start, end))
+        
+        # Update the remaining particles from the bottom up (the bottom row never updates)
+        region = self.grid.grid[:self.grid.height-1, start:end]
+        occupied = region != config.EMPTY
+        if vectorized:
+            occupied &= region != config.SNOW_FLAKES
+        ys, xs = np.nonzero(occupied)
+        order = np.lexsort((xs, -ys))
+        for y, x in zip(ys[order].tolist(), (xs[order] + start).tolist()):
+            cell = self.grid.get_cell(y, x)
+            if cell == config.EMPTY:
+                continue  # Emptied earlier this tick
+                
+            # Check for blocked cells
+            below_blocked = (y == self.grid.height-2 or 
+                           self.grid.get_cell(y+1, x) != config.EMPTY)
+            at_floor = self.grid.is_at_floor(y, x)
             
-            # Clear offscreen particles if needed
-            self.grid.clear_offscreen_bottom()
+            if below_blocked or at_floor:
+                self.grid.increment_stationary_time(y, x)
             
-            # Update existence time for all snow flakes
-            for y in range(self.grid.height-2, -1, -1):
-                for x in range(self.grid.width):
-                    cell = self.grid.get_cell(y, x)
-                    if cell == config.EMPTY:
-                        continue
-                        
-                    # Check for blocked cells
-                    below_blocked = (y == self.grid.height-2 or 
-                                   self.grid.get_cell(y+1, x) != config.EMPTY)
-                    at_floor = self.grid.is_at_floor(y, x)
-                    
-                    if below_blocked or at_floor:
-                        self.grid.increment_stationary_time(y, x)
-                    
-                    # Handle state transitions
-                    if (self.physics.handle_compression(y, x) or
-                        self.physics.handle_snow_packing(y, x) or
-                        self.physics.handle_ice_formation(y, x) or
-                        self.physics.handle_melting(y, x, self.state['temperature'])):
-                        continue
-                    
-                    # Calculate and apply movement
-                    moves = self.physics.calculate_movement(y, x)
-                    if not self.physics.apply_movement(y, x, moves):
-                        # If no movement, might need to reset stationary time
-                        if not (below_blocked or at_floor):
-                            self.grid.reset_stationary_time(y, x)
+            # Handle state transitions
+            if vectorized:
+                if self.physics.transitioned[y, x]:
+                    continue
+            elif (self.physics.handle_compression(y, x) or
+                  self.physics.handle_snow_packing(y, x) or
+                  self.physics.handle_ice_formation(y, x)):
+                continue
             
-            time.sleep(config.GRAVITY_DELAY)
+            # Flakes only move on the ticks their speed schedules
+            if not self.physics.is_due(y, x):
+                continue
+            
+            # Calculate and apply movement
+            moves = self.physics.calculate_movement(y, x)
+            if not self.physics.apply_movement(y, x, moves):
+                # If no movement, might need to reset stationary time
+                if not (below_blocked or at_floor):
+                    self.grid.reset_stationary_time(y, x)
+    
+        self.clock.tick += 1
+
+    def snapshot(self):
+        """Get a snapshot of the simulation state."""
+        data = self.grid.snapshot()
+        data['tick'] = np.array(self.clock.tick)
+        data['wind'] = np.array([self.physics.wind_strength,
+                                 self.physics.target_wind_strength,
+                                 self.physics.wind_ticks_left])
+        return data
+
+    def restore(self, data):
+        """Restore the simulation state from a snapshot, all or nothing."""
+        tick = int(data['tick'])
+        wind, target, ticks_left = data['wind'].tolist()
+        self.grid.restore(data)
+        self.clock.tick = tick
+        self.physics.wind_strength = wind
+        self.physics.target_wind_strength = target
+        self.physics.wind_ticks_left = int(ticks_left)
+
+    def fast_forward(self, ticks, cache=False):
+        """Queue ticks to run at full speed, or restore their result from the cache."""
+        if cache:
+            key = snapshot.cache_key(self, ticks)
+            data = snapshot.load(key)
+            if data is not None:
+                try:
+                    self.restore(data)
+                    return
+                except (KeyError, ValueError):
+                    pass  # Stale snapshot, just run the ticks again
+            self.snapshot_key = key
+        self.fast_forward_left += ticks
+        self.fast_forward_total += ticks
+
+    def run_fast_forward(self, budget=0.05):
+        """Run queued fast-forward ticks for up to budget seconds of wall time."""
+        end = time.monotonic() + budget
+        while self.fast_forward_left and self.running:
+            self.step()
+            self.fast_forward_left -= 1
+            if time.monotonic() >= end:
+                break
+        if not self.fast_forward_left:
+            self.fast_forward_total = 0
+            if self.snapshot_key is not None:
+                snapshot.save(self.snapshot_key, self.snapshot())
+                self.snapshot_key = None
+            self.clock.reset()  # Resume real time from now
 
     def handle_input(self, key):
         """Handle keyboard input."""
@@ -95,32 +203,181 @@ class SnowSimulation:
                 self.state['current_spawn_rate'] - config.SPAWN_RATE_STEP, 
                 config.MIN_SPAWN_RATE
             )
-        elif key.name == 'KEY_LEFT':  # Left arrow for wind
-            self.physics.set_target_wind(
-                -config.MAX_WIND_STRENGTH * random.uniform(0.7, 1.0)
-            )
-        elif key.name == 'KEY_RIGHT':  # Right arrow for wind
-            self.physics.set_target_wind(
-                config.MAX_WIND_STRENGTH * random.uniform(0.7, 1.0)
-            )
+        elif key.name in ('KEY_LEFT', 'KEY_RIGHT'):  # Arrows blow wind with a gust front
+            direction = -1 if key.name == 'KEY_LEFT' else 1
+            strength = direction * config.MAX_WIND_STRENGTH * random.uniform(0.7, 1.0)
+            self.physics.set_target_wind(strength)
+            self.physics.inject_gust(strength)
         elif key in ['+', '=']:  # Increase temperature
             self.state['temperature'] = min(self.state['temperature'] + 1, 10)
         elif key in ['-', '_']:  # Decrease temperature
             self.state['temperature'] = max(self.state['temperature'] - 1, -10)
         elif key.lower() == 'h':  # Toggle help display (upper or lowercase)
             self.show_status = not self.show_status
+        elif key.lower() == 'f':  # Fast-forward
+            self.fast_forward(config.FAST_FORWARD_TICKS)
+        elif key in ['[', ']']:  # Pan a quarter screen across a wider world
+            step = max(self.grid.visible_width // 4, 1)
+            self.grid.scroll(step if key == ']' else -step)
         
         return False
 
+    def mouse_to_grid(self, event):
+        """Convert a mouse event to (button, y, x, is_press) in grid coordinates."""
+        # Adjust coordinates for grid position
+        y = event.y - 2  # Account for status lines at top
+        x = event.x + self.grid.visible_start
+        
+        if not (0 <= y < self.grid.height and 
+                self.grid.visible_start <= x < self.grid.visible_start + self.grid.visible_width):
+            return None
+        return event.button, y, x, event.is_press
+
+    def handle_mouse(self, btn, y, x, is_press):
+        """Handle a mouse event, deferring drag motion to the next stroke."""
+        if btn == 0:  # Left click
+            # Finish any drag before the button state changes
+            self.apply_stroke()
+            if is_press:
+                # Start tracking mouse position
+                self.last_mouse_x = x
+                self.last_mouse_y = y
+            else:
+                # Clear last position on release
+                self.last_mouse_x = None
+                self.last_mouse_y = None
+                self.drag_target = None
+                # On mouse up, create or destroy snow
+                cell = self.grid.get_cell(y, x)
+                if cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
+                    self.grid.erase_brush(y, x)
+                elif cell in [config.EMPTY, config.SNOW_FLAKES]:
+                    self.grid.fill_brush(y, x, config.SNOW)
+        elif btn == 32 and self.last_mouse_x is not None:  # Mouse move while held (btn 32 is motion)
+            # Coalesce motion events into a single stroke per frame
+            self.drag_target = (y, x)
+
+    def apply_stroke(self):
+        """Push particles along the drag stroke collected since the last frame."""
+        if self.drag_target is None:
+            return
+        y, x = self.drag_target
+        self.drag_target = None
+        self.grid.push_brush(self.last_mouse_y, self.last_mouse_x, y, x)
+        
+        # Update last position
+        self.last_mouse_x = x
+        self.last_mouse_y = y
+
+    async def physics_task(self):
+        """Run physics ticks on the fixed timestep."""
+        self.clock.reset()
+        while self.running:
+            if self.fast_forward_left:
+                # Run flat out, yielding between slices so input and progress keep going
+                self.run_fast_forward()
+                self.publish()
+                await asyncio.sleep(0)
+                continue
+            ticks = self.clock.advance()
+            for _ in range(ticks):
+                started = time.perf_counter()
+                self.step()
+                if self.governor.record(time.perf_counter() - started):
+                    self.governor.apply(self.grid, self.physics)
+                    self.renderer.quality = self.governor.quality
+            if ticks:
+                self.publish()
+            await asyncio.sleep(self.clock.time_until_next())
+
+    def publish(self):
+        """Share the current grid through the publisher, if there is one."""
+        if self.publisher is not None:
+            self.publisher.publish(self.grid, self.clock.tick)
+
+    async def input_task(self, reader):
+        """Handle input events as they are decoded."""
+        while self.running:
+            for event in await reader.get_events():
+                if isinstance(event, MouseEvent):
+                    mouse = self.mouse_to_grid(event)
+                    if mouse:
+                        self.handle_mouse(*mouse)
+                elif self.handle_input(event):
+                    self.stop()
+                    return
+
+    async def render_task(self):
+        """Draw frames, applying the drag stroke collected for each one."""
+        loop = asyncio.get_running_loop()
+        writing = None  # Frame write running in a worker thread
+        try:
+            while self.running:
+                self.apply_stroke()
+                # Skip frames while the terminal is behind, so the next one shows the latest state
+                if ((writing is not None and not writing.done()) or
+                        self.renderer.is_backlogged()):
+                    self.renderer.count_frame(False)
+                else:
+                    if self.fast_forward_total:
+                        done = self.fast_forward_total - self.fast_forward_left
+                        self.renderer.render_progress(done, self.fast_forward_total)
+                    else:
+                        self.renderer.render_grid(self.state, self.show_status)
+                    writing = loop.run_in_executor(None, self.renderer.write_frame)
+                    self.renderer.count_frame(True)
+                await asyncio.sleep(config.FRAME_DELAY)
+        finally:
+            if writing is not None:
+                await asyncio.shield(writing)  # Never leave a frame half written
+
+    async def broadcast_task(self):
+        """Stream the visible window to the server's viewers."""
+        await self.server.start()
+        try:
+            while self.running:
+                self.server.broadcast(*self.grid.get_display_frame(
+                    self.grid.visible_start, self.grid.visible_start + self.grid.visible_width))
+                await asyncio.sleep(config.FRAME_DELAY)
+        finally:
+            await self.server.stop()
+
+    async def drive(self):
+        """Run the physics, input and render tasks until the simulation stops."""
+        loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        if not self.running:
+            return
+        loop.add_signal_handler(signal.SIGINT, self.stop)
+        
+        tasks = [asyncio.ensure_future(self.physics_task())]
+        if self.server is not None:
+            tasks.append(asyncio.ensure_future(self.broadcast_task()))
+        
+        # Read and decode input whenever the terminal has data
+        reader = None
+        if not self.headless:
+            reader = InputReader(sys.stdin.fileno())
+            reader.start(loop)
+            tasks.append(asyncio.ensure_future(self.input_task(reader)))
+            tasks.append(asyncio.ensure_future(self.render_task()))
+        try:
+            await self.stopped.wait()
+        finally:
+            if reader is not None:
+                reader.stop()
+            loop.remove_signal_handler(signal.SIGINT)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self.publisher is not None:
+                self.publisher.close()
+
     def run(self):
         """Run the snow simulation."""
-        # Set up signal handler
-        signal.signal(signal.SIGINT, self.handle_exit)
-        
-        # Start physics thread
-        physics_thread = Thread(target=self.physics_loop)
-        physics_thread.daemon = True
-        physics_thread.start()
+        if self.headless:
+            asyncio.run(self.drive())
+            return
         
         # Enable mouse reporting
         print('\033[?1000h')  # Enable mouse click tracking
@@ -133,108 +390,7 @@ class SnowSimulation:
              self.renderer.term.hidden_cursor():
             
             self.renderer.clear_screen()
-            
-            while self.running:
-                val = self.renderer.term.inkey(timeout=0.01)
-                
-                # Handle mouse events
-                if val == '\x1b':  # ESC sequence start
-                    seq = val
-                    while True:
-                        next_char = self.renderer.term.inkey(timeout=0.01)
-                        if not next_char:
-                            break
-                        seq += next_char
-                        if seq.endswith('M') or seq.endswith('m'):
-                            break
-                    
-                    # Parse SGR mouse sequence: \x1b[<Cb;Cx;Cy[M|m]
-                    if seq.startswith('\x1b[<') and (seq.endswith('M') or seq.endswith('m')):
-                        try:
-                            parts = seq[3:-1].split(';')
-                            btn = int(parts[0])
-                            x = int(parts[1]) - 1  # Convert to 0-based
-                            y = int(parts[2]) - 1  # Convert to 0-based
-                            
-                            # Process mouse events
-                            is_press = seq.endswith('M')
-                            is_release = seq.endswith('m')
-                            
-                            # Adjust coordinates for grid position
-                            y = y - 2  # Account for status lines at top
-                            x = x + self.grid.visible_start
-                            
-                            if 0 <= y < self.grid.height and self.grid.visible_start <= x < self.grid.visible_start + self.grid.visible_width:
-                                if btn == 0:  # Left click
-                                    if is_press:
-                                        # Start tracking mouse position
-                                        self.last_mouse_x = x
-                                        self.last_mouse_y = y
-                                    elif is_release:
-                                        # Clear last position on release
-                                        self.last_mouse_x = None
-                                        self.last_mouse_y = None
-                                        # On mouse up, create or destroy snow
-                                        cell = self.grid.get_cell(y, x)
-                                        if cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                                            # Remove snow/ice in a 7x7 grid
-                                            for dy in range(-3, 4):
-                                                for dx in range(-3, 4):
-                                                    ny, nx = y + dy, x + dx
-                                                    if (0 <= ny < self.grid.height and 
-                                                        self.grid.visible_start <= nx < self.grid.visible_start + self.grid.visible_width):
-                                                        cell = self.grid.get_cell(ny, nx)
-                                                        if cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                                                            self.grid.set_cell(ny, nx, config.EMPTY)
-                                        elif cell in [config.EMPTY, config.SNOW_FLAKES]:
-                                            # Add snow in a 7x7 grid
-                                            for dy in range(-3, 4):
-                                                for dx in range(-3, 4):
-                                                    ny, nx = y + dy, x + dx
-                                                    if (0 <= ny < self.grid.height and 
-                                                        self.grid.visible_start <= nx < self.grid.visible_start + self.grid.visible_width):
-                                                        if self.grid.get_cell(ny, nx) == config.EMPTY:
-                                                            self.grid.set_cell(ny, nx, config.SNOW)
-                                elif btn == 32 and self.last_mouse_x is not None:  # Mouse move while held (btn 32 is motion)
-                                    # Calculate movement direction
-                                    move_dx = x - self.last_mouse_x
-                                    move_dy = y - self.last_mouse_y
-                                        
-                                    # Only process if there was movement
-                                    if move_dx != 0 or move_dy != 0:
-                                        # Normalize movement direction
-                                        magnitude = (move_dx * move_dx + move_dy * move_dy) ** 0.5
-                                        if magnitude > 0:
-                                            norm_dx = move_dx / magnitude
-                                            norm_dy = move_dy / magnitude
-                                            
-                                            # Push particles in 7x7 grid in movement direction
-                                            for dy in range(-3, 4):
-                                                for dx in range(-3, 4):
-                                                    ny, nx = y + dy, x + dx
-                                                    if (0 <= ny < self.grid.height and 
-                                                        self.grid.visible_start <= nx < self.grid.visible_start + self.grid.visible_width):
-                                                        cell = self.grid.get_cell(ny, nx)
-                                                        if cell in [config.SNOW, config.PACKED_SNOW, config.ICE, config.SNOW_FLAKES]:
-                                                            # Push in movement direction
-                                                            target_x = int(nx + norm_dx)
-                                                            target_y = int(ny + norm_dy)
-                                                            
-                                                            # Check if target position is valid and empty
-                                                            if (0 <= target_y < self.grid.height and
-                                                                self.grid.visible_start <= target_x < self.grid.visible_start + self.grid.visible_width and
-                                                                self.grid.get_cell(target_y, target_x) == config.EMPTY):
-                                                                self.grid.move_cell(ny, nx, target_y, target_x)
-                                    
-                                    # Update last position
-                                    self.last_mouse_x = x
-                                    self.last_mouse_y = y
-                        except (IndexError, ValueError):
-                            pass  # Invalid mouse sequence
-                elif self.handle_input(val):
-                    break
-                
-                self.renderer.render_grid(self.state, self.show_status)
+            asyncio.run(self.drive())
         
         # Disable mouse reporting and restore terminal
         print('\033[?1000l')  # Disable mouse click tracking
@@ -243,9 +399,57 @@ class SnowSimulation:
         print('\033[?1006l')  # Disable SGR extended mouse reporting
         print(self.renderer.term.normal)
 
+def parse_size(text):
+    """Parse a WIDTHxHEIGHT size."""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+def parse_duration(text):
+    """Parse a tick count, or a simulated time like 90s or 10m, into ticks."""
+    units = {'s': 1, 'm': 60, 'h': 3600}
+    if text[-1:].lower() in units:
+        seconds = float(text[:-1]) * units[text[-1].lower()]
+        return int(round(seconds / config.GRAVITY_DELAY))
+    return int(text)
+
 def main():
     """Entry point for the snow simulation."""
-    simulation = SnowSimulation()
+    parser = argparse.ArgumentParser(prog='snow-sim', description="Terminal snow simulation")
+    parser.add_argument('--serve', metavar='ADDRESS',
+                        help="stream the scene to viewers on unix:PATH or HOST:PORT")
+    parser.add_argument('--headless', action='store_true',
+                        help="with --serve or --publish, run without drawing to this terminal")
+    parser.add_argument('--size', type=parse_size, metavar='WIDTHxHEIGHT',
+                        help="visible scene size instead of the terminal size")
+    parser.add_argument('--fast-forward', type=parse_duration, metavar='TICKS',
+                        help="run this many ticks (or simulated time like 10m) at full speed first")
+    parser.add_argument('--warm-cache', action='store_true',
+                        help="with --fast-forward, reuse a cached snapshot of the result")
+    parser.add_argument('--publish', metavar='NAME',
+                        help="share the grid in the shared memory segment NAME, see snow.shm")
+    parser.add_argument('--connect', metavar='ADDRESS',
+                        help="view a scene streamed by snow-sim --serve")
+    args = parser.parse_args()
+    if args.headless and not (args.serve or args.publish):
+        parser.error("--headless needs --serve or --publish")
+    if args.warm_cache and not args.fast_forward:
+        parser.error("--warm-cache needs --fast-forward")
+
+    if args.connect:
+        try:
+            Viewer(args.connect).run()
+        except OSError as e:
+            sys.exit(f"snow-sim: cannot connect to {args.connect}: {e}")
+        return
+
+    try:
+        server = FrameServer(args.serve) if args.serve else None
+    except FileExistsError as e:
+        sys.exit(f"snow-sim: cannot serve on {args.serve}: {e}")
+    publisher = GridPublisher(args.publish) if args.publish else None
+    simulation = SnowSimulation(args.size, server, args.headless, publisher)
+    if args.fast_forward:
+        simulation.fast_forward(args.fast_forward, args.warm_cache)
     simulation.run()
 
 if __name__ == '__main__':
@@ -1,7 +1,65 @@
 """Physics engine for snow simulation."""
 import random
-import time
-from . import config
+import numpy as np
+from . import config, rules
+
+# Neighbor offsets (dy, dx) for the count maps
+ADJACENT_OFFSETS = [(0, -1), (0, 1), (-1, 0), (1, 0)]  # Left, right, up, down
+DIAGONAL_OFFSETS = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+# Particle classes whose maps the melting and settling rules consult
+NEIGHBOR_CLASSES = {
+    'flake': (config.SNOW_FLAKES,),
+    'snow_or_packed': (config.SNOW, config.PACKED_SNOW),
+    'packed_or_ice': (config.PACKED_SNOW, config.ICE),
+}
+
+# Particle types that can melt, in the order they are sampled
+MELTING_TYPES = (config.SNOW_FLAKES, config.SNOW, config.PACKED_SNOW, config.ICE)
+
+# (dy, dx) of the flake moves weighed in move_flakes
+FLAKE_MOVES = np.array([(1, 0), (1, -1), (1, 1), (0, -1), (0, 1)])
+
+# Columns of noise blended into each gust, see update_wind_field
+GUST_NOISE_WIDTH = 9
+# Fraction of a gust left after each update
+GUST_DECAY = 0.99
+# Fraction of the row profile's turbulence left after each update
+ROW_GUST_DECAY = 0.9
+
+def neighbor_count(mask, offsets):
+    """Count set neighbors of every cell in mask using shifted-array sums."""
+    height, width = mask.shape
+    padded = np.pad(mask, 1).astype(np.int8)  # Out of bounds counts as unset
+    counts = np.zeros((height, width), dtype=np.int8)
+    for dy, dx in offsets:
+        counts += padded[1+dy:1+dy+height, 1+dx:1+dx+width]
+    return counts
+
+def smooth_noise(size, width=GUST_NOISE_WIDTH):
+    """Get unit-variance noise that varies smoothly over about width cells."""
+    noise = np.random.standard_normal(size + width - 1)
+    return np.convolve(noise, np.ones(width) / np.sqrt(width), mode='valid')
+
+def sample_cells(cells, count):
+    """Pick count distinct entries of cells, in time proportional to count when it is small."""
+    if count * 2 > len(cells):
+        return np.random.permutation(cells)[:count]
+    # Draw with replacement and top up the duplicates, rather than permuting every cell
+    picked = np.unique(np.random.randint(len(cells), size=count))
+    while len(picked) < count:
+        extra = np.random.randint(len(cells), size=count - len(picked))
+        picked = np.unique(np.concatenate([picked, extra]))
+    return cells[picked]
+
+def column_depth(mask):
+    """Count the unbroken run of set cells directly below every cell in mask."""
+    depth = np.zeros(mask.shape, dtype=int)
+    run = np.zeros(mask.shape[1], dtype=int)
+    for y in range(mask.shape[0]-1, -1, -1):
+        depth[y] = run
+        run = np.where(mask[y], run + 1, 0)
+    return depth
 
 class Physics:
     def __init__(self, grid):
@@ -9,10 +67,33 @@ class Physics:
         self.grid = grid
         self.wind_strength = 0
         self.target_wind_strength = 0
-        self.wind_stop_time = 0
-        self.base_snow_time = 1000  # Base time for snow packing
-        self.base_ice_time = 2000   # Base time for ice formation
+        self.wind_ticks_left = 0  # Updates until the current gust stops
+        # Wind at every cell: wind_strength plus drifting gusts, see update_wind_field
+        self.gusts = np.zeros(grid.width)       # Per-column gust strength
+        self.row_gusts = np.zeros(grid.height)  # Per-row turbulence
+        self.wind_field = np.zeros((grid.height, grid.width))
+        self.base_snow_time = config.BASE_SNOW_TIME  # Base time for snow packing
+        self.base_ice_time = config.BASE_ICE_TIME    # Base time for ice formation
         self.current_backoff = 1.0  # Current backoff factor
+        # Snowflake masses indexed by the flakes' char field
+        self.mass_table = np.array(config.SNOW_MASSES, dtype=float)
+        self.snow_height = 0  # Rows of accumulated snow, see calculate_backoff_factor
+        # Transition rules compiled into lookup tables, see rules.py
+        self.compression_table, self.packing_table, self.ice_table = \
+            rules.compile_tables(config.RULES)
+        # Per-tick neighborhood maps, see update_neighbor_counts
+        self.rule_codes = None
+        self.class_masks = {}
+        self.neighbor_counts = {}
+        self.column_depths = {}
+        # Cells that packed or froze this tick, see apply_transitions
+        self.transitioned = None
+        # Snowflakes due to move this tick, see update_fall_schedule
+        self.due_flakes = None
+        # Off-screen columns simulated beside the view, or None for all; see active_columns
+        self.margin_width = None
+        # Ticks between backoff factor updates, raised by the quality governor
+        self.backoff_interval = 1
         
     def calculate_backoff_factor(self):
         """Calculate new backoff factor based on snow coverage."""
@@ -20,20 +101,15 @@ class Physics:
         mid_height = total_height // 2
         
         # Count snow particles in each row
-        snow_counts = [0] * total_height
-        for y in range(total_height):
-            for x in range(self.grid.width):
-                cell = self.grid.get_cell(y, x)
-                if cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                    snow_counts[y] += 1
+        snow_counts = np.isin(self.grid.grid, [config.SNOW, config.PACKED_SNOW, config.ICE]).sum(axis=1)
         
         # Find highest point with significant snow (>10% of width)
         threshold = self.grid.width * 0.1
         snow_height = 0
-        for y in range(total_height):
-            if snow_counts[y] > threshold:
-                snow_height = total_height - y
-                break
+        rows = np.flatnonzero(snow_counts > threshold)
+        if len(rows):
+            snow_height = total_height - int(rows[0])
+        self.snow_height = snow_height
         
         # Calculate percentage of height covered relative to mid-height target
         coverage = snow_height / total_height if total_height > 0 else 0
@@ -47,17 +123,205 @@ class Physics:
             excess = (coverage - target_coverage) / target_coverage  # Normalized excess
             return 1.0 + (excess * excess * 8)  # Steeper quadratic increase up to 9x slower
         
+    def update_neighbor_counts(self):
+        """Precompute the neighborhood maps consulted by the rules this tick."""
+        grid = self.grid.grid
+        floor = self.grid.floor_mask()
+        self.rule_codes = rules.neighborhood_codes(grid, floor)
+        for name, types in NEIGHBOR_CLASSES.items():
+            self.class_masks[name] = np.isin(grid, types)
+        
+        # Cells a particle can melt into (floor cells never count)
+        open_cells = ((grid == config.EMPTY) | self.class_masks['flake']) & ~floor
+        self.neighbor_counts['open'] = neighbor_count(open_cells, ADJACENT_OFFSETS + DIAGONAL_OFFSETS)
+        
+        # Depth of the snow column below each cell
+        self.column_depths['snow_or_packed'] = column_depth(self.class_masks['snow_or_packed'])
+        self.column_depths['packed_or_ice'] = column_depth(self.class_masks['packed_or_ice'])
+
+    def active_columns(self):
+        """Get the (start, end) columns to simulate: the view and up to margin_width beside it."""
+        if self.margin_width is None:
+            return 0, self.grid.width
+        start = max(self.grid.visible_start - self.margin_width, 0)
+        end = min(self.grid.visible_start + self.grid.visible_width + self.margin_width,
+                  self.grid.width)
+        return start, end
+
+    def active_flakes(self, columns=None):
+        """Get a mask of the flakes the update loop visits this tick."""
+        ys, xs = self.grid.flakes.live('y'), self.grid.flakes.live('x')
+        start, end = columns if columns is not None else (0, self.grid.width)
+        # The bottom row never updates, and skipped columns make no progress
+        return (ys <= self.grid.height-2) & (xs >= start) & (xs < end)
+
+    def update_fall_schedule(self, columns=None):
+        """Advance snowflake fall progress and return a mask of the flakes due to move."""
+        flakes = self.grid.flakes
+        due = self.active_flakes(columns)
+        if config.SCHEDULED_MOVEMENT:
+            # Each flake accumulates its speed and moves once per whole step
+            progress = flakes.live('progress')
+            progress[due] += flakes.live('speed')[due]
+            due &= progress >= 1.0
+            progress[due] -= 1.0
+            
+        # Per-cell view for the scalar engine
+        self.due_flakes = np.zeros((self.grid.height, self.grid.width), dtype=bool)
+        self.due_flakes[flakes.live('y')[due], flakes.live('x')[due]] = True
+        return due
+
+    def is_due(self, y, x):
+        """Check if the particle at the given position should move this tick."""
+        if self.grid.get_cell(y, x) != config.SNOW_FLAKES:
+            return True
+        return self.due_flakes is None or self.due_flakes[y, x]
+
+    def compression_mask(self, ys, xs):
+        """Check the compression rules for flakes at the given positions, as arrays."""
+        required_time = self.compression_table[self.rule_codes[ys, xs]]
+        return self.grid.stationary_time[ys, xs] > required_time
+
+    def apply_transitions(self, columns=None):
+        """Pack snow and freeze packed snow across the grid with rule table lookups."""
+        grid = self.grid
+        start, end = columns if columns is not None else (0, grid.width)
+        height = grid.height
+        cells = grid.grid[:height-1, start:end]  # The bottom row never updates
+        codes = self.rule_codes[:height-1, start:end]
+        
+        # Blocked cells gain a tick of stationary time before the rules look at it
+        blocked = (grid.grid[1:, start:end] != config.EMPTY) | grid.floor_mask()[:height-1, start:end]
+        blocked[height-2] = True
+        stationary = grid.stationary_time[:height-1, start:end] + blocked
+        
+        packing = ((cells == config.SNOW) &
+                   (stationary > int(self.base_snow_time * self.current_backoff)) &
+                   (self.column_depths['snow_or_packed'][:height-1, start:end] >= self.packing_table[codes]))
+        freezing = ((cells == config.PACKED_SNOW) &
+                    (stationary > int(self.base_ice_time * self.current_backoff)) &
+                    (self.column_depths['packed_or_ice'][:height-1, start:end] >= self.ice_table[codes]))
+        cells[packing] = config.PACKED_SNOW
+        cells[freezing] = config.ICE
+        
+        self.transitioned = np.zeros(grid.grid.shape, dtype=bool)
+        self.transitioned[:height-1, start:end] = packing | freezing
+
+    def update_flakes(self, due, columns=None):
+        """Advance every airborne snowflake with whole-array operations."""
+        grid = self.grid
+        flakes = grid.flakes
+        ys, xs = flakes.live('y').copy(), flakes.live('x').copy()
+        active = self.active_flakes(columns)
+        
+        # Blocked or floor flakes build up stationary time
+        height, width = grid.height, grid.width
+        below = np.minimum(ys + 1, height - 1)
+        at_floor = (ys == height-2) & (xs >= grid.floor_start) & \
+                   (xs < grid.floor_start + grid.floor_width)
+        blocked = (ys == height-2) | (grid.grid[below, xs] != config.EMPTY) | at_floor
+        grid.stationary_time[ys[active & blocked], xs[active & blocked]] += 1
+        
+        # Compression turns flakes into snow in place
+        compress = active & self.compression_mask(ys, xs)
+        
+        # Due flakes that stay airborne pick a move
+        moving = np.flatnonzero(due & ~compress & ~at_floor)
+        moved = self.move_flakes(moving, ys[moving], xs[moving])
+        
+        # Flakes that could not move and are not blocked lose their stationary time
+        stuck = moving[~moved & ~blocked[moving]]
+        grid.stationary_time[ys[stuck], xs[stuck]] = 0
+        
+        grid.drop_flakes(np.flatnonzero(compress), config.SNOW)
+
+    def move_flakes(self, indices, ys, xs):
+        """Choose and apply a move for each given flake, returning a mask of those moved."""
+        grid = self.grid
+        mass = self.mass_table[grid.flakes.char[indices]]
+        wind_effect = self.wind_field[ys, xs] / mass
+        
+        def is_free(to_ys, to_xs):
+            inside = (to_ys < grid.height) & (to_xs >= 0) & (to_xs < grid.width)
+            cells = grid.grid[np.minimum(to_ys, grid.height-1), np.clip(to_xs, 0, grid.width-1)]
+            return inside & (cells == config.EMPTY)
+        
+        # Same weights as calculate_movement: down, diagonals, then horizontal drift
+        left_prob = (0.1 / mass) - wind_effect
+        right_prob = (0.1 / mass) + wind_effect
+        wind_horizontal = np.abs(wind_effect) * (0.5 / mass)
+        weights = np.stack([
+            np.where(is_free(ys + 1, xs), 0.6 + (mass * 0.2), 0.0),
+            np.where(is_free(ys + 1, xs - 1) & (left_prob > 0), left_prob, 0.0),
+            np.where(is_free(ys + 1, xs + 1) & (right_prob > 0), right_prob, 0.0),
+            np.where(is_free(ys, xs - 1) & (wind_effect < 0), wind_horizontal, 0.0),
+            np.where(is_free(ys, xs + 1) & (wind_effect > 0), wind_horizontal, 0.0),
+        ], axis=1)
+        
+        # Weighted choice per flake
+        totals = weights.sum(axis=1)
+        can_move = totals > 0
+        rolls = np.random.random(len(indices)) * totals
+        choice = np.minimum((np.cumsum(weights, axis=1) <= rolls[:, None]).sum(axis=1), 4)
+        to_ys = ys + FLAKE_MOVES[choice, 0]
+        to_xs = xs + FLAKE_MOVES[choice, 1]
+        
+        # When flakes pick the same cell, the lowest one (visited first) gets it
+        candidates = np.flatnonzero(can_move)
+        order = candidates[np.lexsort((xs[candidates], -ys[candidates]))]
+        _, first = np.unique(to_ys[order] * grid.width + to_xs[order], return_index=True)
+        winners = order[first]
+        
+        grid.move_flakes(indices[winners], to_ys[winners], to_xs[winners])
+        moved = np.zeros(len(indices), dtype=bool)
+        moved[winners] = True
+        return moved
+
     def update_wind(self):
         """Update wind strength based on target."""
         # Check if wind should stop
-        if self.wind_stop_time and time.time() >= self.wind_stop_time:
-            self.target_wind_strength = 0
-            self.wind_stop_time = 0
+        if self.wind_ticks_left:
+            self.wind_ticks_left -= 1
+            if not self.wind_ticks_left:
+                self.target_wind_strength = 0
             
         if self.wind_strength < self.target_wind_strength:
             self.wind_strength = min(self.wind_strength + config.WIND_RAMP_SPEED, self.target_wind_strength)
         elif self.wind_strength > self.target_wind_strength:
             self.wind_strength = max(self.wind_strength - config.WIND_RAMP_SPEED, self.target_wind_strength)
+        self.update_wind_field()
+
+    def update_wind_field(self):
+        """Advect the gusts and recompute the wind at every cell."""
+        height, width = self.grid.height, self.grid.width
+        if self.gusts.shape != (width,) or self.row_gusts.shape != (height,):
+            # Grid was resized; start the gusts afresh
+            self.gusts = np.zeros(width)
+            self.row_gusts = np.zeros(height)
+        
+        # Gusts drift downwind with the wind they carry, fading as they go
+        columns = np.arange(width)
+        drift = (self.wind_strength + self.gusts) * config.GUST_SPEED
+        self.gusts = np.interp(columns - drift, columns, self.gusts, left=0, right=0) * GUST_DECAY
+        self.row_gusts *= ROW_GUST_DECAY
+        
+        # Turbulence grows with the wind, so calm air stays calm
+        turbulence = config.WIND_TURBULENCE * abs(self.wind_strength)
+        if turbulence:
+            self.gusts += smooth_noise(width) * turbulence * (1 - GUST_DECAY) ** 0.5
+            self.row_gusts += smooth_noise(height) * turbulence * (1 - ROW_GUST_DECAY) ** 0.5
+        
+        # Stronger aloft than near the ground
+        shear = 1 + config.WIND_SHEAR * (0.5 - np.arange(height) / max(height, 1))
+        self.wind_field = np.clip(np.multiply.outer(shear + self.row_gusts,
+                                                    self.wind_strength + self.gusts), -1.0, 1.0)
+
+    def inject_gust(self, strength):
+        """Start a gust front of the given strength at the upwind edge of the grid."""
+        columns = np.arange(len(self.gusts))
+        edge = len(self.gusts) - 1 if strength < 0 else 0
+        front_width = max(len(self.gusts) / 10, 1)
+        self.gusts += strength * np.exp(-((columns - edge) / front_width) ** 2)
 
     def set_target_wind(self, target):
         """Set the target wind strength and schedule stop time."""
@@ -65,78 +329,19 @@ class Physics:
         if target != 0:  # Only set timer when starting wind
             min_duration, max_duration = config._config['physics']['wind_duration_range']
             duration = random.uniform(min_duration, max_duration)
-            self.wind_stop_time = time.time() + duration
+            # Count the duration in simulated updates rather than wall time
+            self.wind_ticks_left = max(1, int(round(duration / config.GRAVITY_DELAY)))
 
     def handle_compression(self, y, x):
         """Handle compression of particles."""
         if self.grid.get_cell(y, x) != config.SNOW_FLAKES:
             return False
             
-        # Check if at floor with snow above
-        is_at_floor = self.grid.is_at_floor(y, x)
-        if is_at_floor:
-            above = self.grid.get_cell(y-1, x) if y > 0 else None
-            if above in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                self.grid.set_cell(y, x, config.SNOW)
-                return True
-
-        # Check adjacent cells (up, down, left, right)
-        adjacent_snow = 0
-        total_neighbors = 0
-        for dy, dx in [(0, -1), (0, 1), (-1, 0), (1, 0)]:  # Left, right, up, down
-            ny, nx = y + dy, x + dx
-            cell = self.grid.get_cell(ny, nx)
-            if cell is not None:  # If within bounds
-                total_neighbors += 1
-                if cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                    adjacent_snow += 1
-
-        # Convert immediately if surrounded on 3 or more sides
-        if total_neighbors >= 3 and adjacent_snow >= 3:
+        # Convert once stationary longer than the neighborhood requires
+        required_time = self.compression_table[self.rule_codes[y, x]]
+        if self.grid.get_stationary_time(y, x) > required_time:
             self.grid.set_cell(y, x, config.SNOW)
             return True
-
-        # For non-surrounded cases, check diagonal neighbors too
-        snow_neighbors = adjacent_snow
-        flake_neighbors = []
-        for dy in [-1, 0, 1]:
-            for dx in [-1, 0, 1]:
-                if dy == 0 and dx == 0:  # Skip center
-                    continue
-                if dy in [-1, 1] and dx in [-1, 1]:  # Diagonal positions
-                    ny, nx = y + dy, x + dx
-                    cell = self.grid.get_cell(ny, nx)
-                    if cell == config.SNOW_FLAKES:
-                        flake_neighbors.append((ny, nx))
-                    elif cell in [config.SNOW, config.PACKED_SNOW, config.ICE]:
-                        snow_neighbors += 1
-
-        # Check what's below
-        is_on_floor = self.grid.is_at_floor(y, x)
-        below = self.grid.get_cell(y+1, x) if y < self.grid.height-1 else None
-        is_on_snow = below in [config.SNOW, config.PACKED_SNOW, config.ICE]
-        has_support = is_on_floor or is_on_snow
-
-        # Determine compression threshold based on conditions
-        threshold = 4  # Default threshold
-        if has_support:
-            threshold = 3  # Easier when supported
-        if snow_neighbors >= 2:
-            threshold = 2  # Very easy when surrounded by snow
-
-        # Adjust stationary time requirement
-        required_time = 15  # Default time
-        if has_support:
-            required_time = 8  # Faster when supported
-        if snow_neighbors >= 2:
-            required_time = 4  # Very fast when surrounded by snow
-            
-        # Convert if conditions are met
-        if len(flake_neighbors) >= threshold and self.grid.get_stationary_time(y, x) > required_time:
-            # Convert center flake to snow
-            self.grid.set_cell(y, x, config.SNOW)
-            # Keep neighbors to help with buildup
-            return True
         return False
 
     def handle_snow_packing(self, y, x):
@@ -151,31 +356,9 @@ class Physics:
         if self.grid.get_stationary_time(y, x) <= required_time:
             return False
             
-        # Count nearby snow
-        snow_count = 0
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                ny, nx = y + dy, x + dx
-                cell = self.grid.get_cell(ny, nx)
-                if cell in [config.SNOW, config.PACKED_SNOW]:
-                    snow_count += 1
-        
-        # Check depth of snow column below
-        depth = 0
-        check_y = y + 1
-        while check_y < self.grid.height:
-            cell = self.grid.get_cell(check_y, x)
-            if cell not in [config.SNOW, config.PACKED_SNOW]:
-                break
-            depth += 1
-            check_y += 1
-        
-        # Check what's below
-        below = self.grid.get_cell(y+1, x)
-        
-        # Convert if enough snow nearby or enough depth, and has support below
-        if ((snow_count >= 7 or depth >= 4) and  # Increased requirements
-            below in [config.SNOW, config.PACKED_SNOW, config.ICE]):
+        # Convert if the snow column below is as deep as the neighborhood requires
+        depth = self.column_depths['snow_or_packed'][y, x]
+        if depth >= self.packing_table[self.rule_codes[y, x]]:
             self.grid.set_cell(y, x, config.PACKED_SNOW)
             return True
         return False
@@ -192,63 +375,55 @@ class Physics:
         if self.grid.get_stationary_time(y, x) <= required_time:
             return False
             
-        # Count nearby packed snow
-        packed_count = 0
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                ny, nx = y + dy, x + dx
-                cell = self.grid.get_cell(ny, nx)
-                if cell in [config.PACKED_SNOW, config.ICE]:
-                    packed_count += 1
-        
-        # Check depth of packed snow column below
-        depth = 0
-        check_y = y + 1
-        while check_y < self.grid.height:
-            cell = self.grid.get_cell(check_y, x)
-            if cell not in [config.PACKED_SNOW, config.ICE]:
-                break
-            depth += 1
-            check_y += 1
-        
-        # Check what's below
-        below = self.grid.get_cell(y+1, x)
-        
-        # Convert if enough packed snow nearby or enough depth, and has support below
-        if ((packed_count >= 8 or depth >= 5) and  # Increased requirements
-            below in [config.PACKED_SNOW, config.ICE]):
+        # Convert if the packed column below is as deep as the neighborhood requires
+        depth = self.column_depths['packed_or_ice'][y, x]
+        if depth >= self.ice_table[self.rule_codes[y, x]]:
             self.grid.set_cell(y, x, config.ICE)
             return True
         return False
 
-    def handle_melting(self, y, x, temperature):
-        """Handle melting of particles."""
-        cell_type = self.grid.get_cell(y, x)
-        if cell_type == config.EMPTY:
-            return False
-            
+    def apply_melting(self, temperature, columns=None):
+        """Melt a sampled set of particles instead of rolling for every cell."""
         # Calculate melt chance based on temperature
         melt_chance = config.BASE_MELT_CHANCE * (2 ** (temperature / 2))  # Exponential scaling
+        melt_chance = min(melt_chance, 1.0)
+        
+        # Same cells the update loop visits (the bottom row never updates)
+        start, end = columns if columns is not None else (0, self.grid.width)
+        region = self.grid.grid[:self.grid.height-1, start:end]
+        # Sample every type from the grid as it was, so no particle melts twice in a tick
+        types = region.copy()
+        floor = self.grid.floor_mask()[:self.grid.height-1, start:end]
         
-        if random.random() >= melt_chance:
+        for cell_type in MELTING_TYPES:
+            # Number of melt events among this type's particles this tick
+            cells = np.flatnonzero(types == cell_type)
+            events = np.random.binomial(len(cells), melt_chance) if len(cells) else 0
+            if not events:
+                continue
+            ys, xs = np.divmod(sample_cells(cells, events), end - start)
+            # Skip particles an earlier melt has already changed
+            same = region[ys, xs] == cell_type
+            ys, xs = ys[same], xs[same]
+            if cell_type == config.SNOW_FLAKES:
+                # Flakes off the floor always evaporate, so they leave the particle list together
+                off_floor = ~floor[ys, xs]
+                self.grid.drop_flakes(self.grid.flake_index[ys[off_floor], xs[off_floor] + start])
+                continue
+            for y, x in zip(ys.tolist(), (xs + start).tolist()):
+                self.handle_melting(y, x)
+
+    def handle_melting(self, y, x):
+        """Handle melting of a particle picked by apply_melting."""
+        cell_type = self.grid.get_cell(y, x)
+        if cell_type == config.EMPTY:
             return False
             
         # Check if particle can melt/evaporate
         if self.grid.is_at_floor(y, x):
             return False
             
-        can_melt = False
-        for dy in range(-1, 2):
-            for dx in range(-1, 2):
-                ny, nx = y + dy, x + dx
-                if self.grid.is_at_floor(ny, nx):
-                    continue
-                cell = self.grid.get_cell(ny, nx)
-                if cell in [config.EMPTY, config.SNOW_FLAKES]:
-                    can_melt = True
-                    break
-            if can_melt:
-                break
+        can_melt = self.neighbor_counts['open'][y, x] > 0
 
         if not can_melt and cell_type != config.SNOW_FLAKES:
             return False
@@ -275,12 +450,7 @@ class Physics:
         """Get the mass of a snowflake based on its character."""
         if self.grid.get_cell(y, x) != config.SNOW_FLAKES:
             return 1.0
-        char = self.grid.get_display_char(y, x)
-        try:
-            idx = config.SNOW_CHARS.index(char)
-            return config.SNOW_MASSES[idx]
-        except ValueError:
-            return 1.0  # Default mass if character not found
+        return float(self.mass_table[self.grid.get_snowflake_char(y, x)])
 
     def calculate_movement(self, y, x):
         """Calculate possible movement directions for a particle."""
@@ -297,7 +467,7 @@ class Physics:
         
         # Adjust wind effect based on mass (lighter particles affected more by wind)
         wind_multiplier = 1.0 / mass if cell_type == config.SNOW_FLAKES else 0.3
-        wind_effect = self.wind_strength * wind_multiplier
+        wind_effect = self.wind_field[y, x] * wind_multiplier
         
         if cell_type == config.SNOW_FLAKES:
             # Snow flakes affected by wind and mass
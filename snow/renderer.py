@@ -1,19 +1,49 @@
 """Terminal renderer for snow simulation."""
+import struct
 import sys
+import time
+
+import numpy as np
+
 from . import config
+from .frame import FrameEncoder
+
+try:
+    import fcntl
+    import termios
+    TIOCOUTQ = termios.TIOCOUTQ  # Bytes written to the tty but not yet sent
+except (ImportError, AttributeError):
+    TIOCOUTQ = None
 
 class Renderer:
     def __init__(self, grid):
         """Initialize renderer with grid reference."""
         self.grid = grid
         self.term = config.term
+        self.encoder = FrameEncoder(self.term)
+        self.encoder.preload(grid)
+        # Output pacing, see write_frame and count_frame
+        self.write_latency = 0.0  # Smoothed seconds per frame write
+        self.write_done = 0.0  # When the last frame write finished
+        self.fps = 0.0  # Frames actually shown per second
+        self.drops = 0.0  # Frames dropped per second
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.fps_since = time.monotonic()
+        # Simulation quality set by the quality governor, shown in the status line
+        self.quality = 1.0
+        # Rasterized status line overlay, see update_hud
+        self.hud_key = None
+        self.hud_x = 0
+        self.hud_y = 0
+        self.hud_glyphs = np.zeros(0, dtype=int)
 
     def clear_screen(self):
         """Clear the terminal screen."""
         print(self.term.home + self.term.clear)
 
-    def update_status_display(self, state):
-        """Update the status display in the grid's background layer."""
+    def get_status_text(self, state):
+        """Build the status line text."""
         # Get status text components
         status = "ON" if state['snowing'] else "OFF"
         spawn_rate_percent = int(state['current_spawn_rate'] * 100)
@@ -26,58 +56,105 @@ class Renderer:
         else:
             wind_indicator = "Wind: 0%"
             
-        status_text = (f"Q: Quit | SPACE: Toggle Snow [{status}] | "
-                      f"↑/↓: Adjust Spawn Rate ({spawn_rate_percent}%) | "
-                      f"←/→: Wind | +/-: Temp ({state['temperature']}) | "
-                      f"{wind_indicator} | "
-                      f"H: Toggle Help | "
-                      f"Click: Add/Remove Snow")
-
-        # Calculate position based on config
-        x_pos = int((config.STATUS_DISPLAY['x'] / 100.0) * self.grid.visible_width) + self.grid.visible_start
-        y_pos = int((config.STATUS_DISPLAY['y'] / 100.0) * self.grid.height)
+        return (f"Q: Quit | SPACE: Toggle Snow [{status}] | "
+                f"↑/↓: Adjust Spawn Rate ({spawn_rate_percent}%) | "
+                f"←/→: Wind | +/-: Temp ({state['temperature']}) | "
+                f"{wind_indicator} | "
+                f"FPS: {self.fps:.0f} ({self.drops:.0f} dropped) | "
+                f"Quality: {self.quality:.0%} | "
+                f"F: Fast-forward | "
+                f"{'[/]: Pan | ' if self.grid.world_width > self.grid.width else ''}"
+                f"H: Toggle Help | "
+                f"Click: Add/Remove Snow")
 
-        # Clear previous status line
-        for x in range(self.grid.width):
-            self.grid.set_background(y_pos, x, ' ')
+    def update_hud(self, state):
+        """Re-rasterize the HUD overlay if anything it shows has changed."""
+        key = (state['snowing'], int(state['current_spawn_rate'] * 100),
+               state['temperature'], int(state['wind_strength'] * 100),
+               round(self.fps), round(self.drops), self.quality,
+               self.grid.visible_width, self.grid.height)
+        if key == self.hud_key:
+            return
+        self.hud_key = key
 
-        # Set new status text in background layer
-        for i, char in enumerate(status_text):
-            if x_pos + i < self.grid.width:
-                self.grid.set_background(y_pos, x_pos + i, char, config.STATUS_DISPLAY['color'])
+        # Place the text relative to the visible area, clipped to it
+        x_pos = int((config.STATUS_DISPLAY['x'] / 100.0) * self.grid.visible_width)
+        text = self.get_status_text(state)[:max(self.grid.visible_width - x_pos, 0)]
+        self.hud_y = int((config.STATUS_DISPLAY['y'] / 100.0) * self.grid.height)
+        self.hud_x = x_pos
+        self.hud_glyphs = np.array([ord(char) for char in text], dtype=int)
 
-    def hex_to_rgb(self, hex_color):
-        """Convert hex color to RGB tuple."""
-        hex_str = hex(hex_color)[2:].zfill(6)  # Remove '0x' prefix and pad to 6 digits
-        return tuple(int(hex_str[i:i+2], 16) for i in (0, 2, 4))
+    def draw_hud(self, glyphs, colors):
+        """Composite the HUD overlay on top of a frame."""
+        if not 0 <= self.hud_y < glyphs.shape[0]:
+            return
+        end = self.hud_x + len(self.hud_glyphs)
+        glyphs[self.hud_y, self.hud_x:end] = self.hud_glyphs
+        colors[self.hud_y, self.hud_x:end] = config.STATUS_DISPLAY['color']
 
     def render_grid(self, state, show_status=False):
         """Render the current state of the grid."""
         self.grid.update_dimensions()
         
-        # Update or clear status in background layer
+        glyphs, colors = self.grid.get_display_frame(
+            self.grid.visible_start, self.grid.visible_start + self.grid.visible_width)
+        
+        # The status line is an overlay on top of the scene
         if show_status:
-            self.update_status_display(state)
-        else:
-            # Clear status line
-            y_pos = int((config.STATUS_DISPLAY['y'] / 100.0) * self.grid.height)
-            for x in range(self.grid.width):
-                self.grid.set_background(y_pos, x, ' ')
+            self.update_hud(state)
+            self.draw_hud(glyphs, colors)
             
-        output = []
-        
-        # Render the visible portion of the grid
-        for y in range(self.grid.height):
-            for x in range(self.grid.visible_start, 
-                         self.grid.visible_start + self.grid.visible_width):
-                char, color = self.grid.get_display_char(y, x)
-                if color is not None:
-                    r, g, b = self.hex_to_rgb(color)
-                    output.append(self.term.color_rgb(r, g, b) + char)
-                else:
-                    output.append(self.term.white + char)
-            output.append('\n')
-        
-        # Write the final output
-        sys.stdout.write(self.term.home + ''.join(output))
-        sys.stdout.flush()
+        # Encode the visible portion of the grid and write it in one go
+        self.encoder.encode(glyphs, colors)
+        sys.stdout.flush()  # Keep ordering with anything printed earlier
+
+    def render_progress(self, done, total):
+        """Render a fast-forward progress bar over the top row."""
+        width = self.grid.visible_width
+        text = f" Fast-forwarding {done}/{total} ticks ({done * 100 // total}%) "
+        bar_width = max(width - len(text), 0)
+        filled = bar_width * done // total
+        line = (text + '█' * filled + '░' * (bar_width - filled))[:width]
+        glyphs = np.array([[ord(char) for char in line]], dtype=int)
+        colors = np.full_like(glyphs, config.STATUS_DISPLAY['color'])
+        self.encoder.encode(glyphs, colors)
+        sys.stdout.flush()  # Keep ordering with anything printed earlier
+
+    def write_frame(self):
+        """Write the encoded frame, blocking until the terminal accepts it."""
+        start = time.monotonic()
+        self.encoder.flush(sys.stdout.fileno())
+        self.write_done = time.monotonic()
+        self.write_latency += (self.write_done - start - self.write_latency) * 0.2
+
+    def output_pending(self):
+        """Get the bytes still queued for the terminal, or 0 if unknown."""
+        if TIOCOUTQ is None:
+            return 0
+        try:
+            queued = fcntl.ioctl(sys.stdout.fileno(), TIOCOUTQ, b'\0' * 4)
+        except OSError:
+            return 0  # Not a tty
+        return struct.unpack('i', queued)[0]
+
+    def is_backlogged(self):
+        """Check if the terminal is still behind with earlier frames."""
+        # More than a frame still queued means new frames would only pile up
+        if self.output_pending() > self.encoder.length:
+            return True
+        # A slow write means the terminal is still drawing; give it as long again before the next
+        return time.monotonic() - self.write_done < self.write_latency
+
+    def count_frame(self, shown):
+        """Count a shown or dropped frame and update the effective FPS."""
+        if shown:
+            self.frames_shown += 1
+        else:
+            self.frames_dropped += 1
+        now = time.monotonic()
+        if now - self.fps_since >= 1.0:
+            self.fps = self.frames_shown / (now - self.fps_since)
+            self.drops = self.frames_dropped / (now - self.fps_since)
+            self.frames_shown = 0
+            self.frames_dropped = 0
+            self.fps_since = now
@@ -0,0 +1,116 @@
+"""Transition rules compiled into neighborhood lookup tables.
+
+Each cell's neighborhood is encoded as one integer: the rule class of each
+of its 8 neighbors as a base-5 digit, plus a floor bit. The rules from
+config.RULES are evaluated once for every possible code at startup, so
+checking a cell is a single table lookup.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from . import config
+
+# Rule classes; out-of-bounds neighbors count as EMPTY_CLASS
+EMPTY_CLASS, FLAKE_CLASS, SNOW_CLASS, PACKED_CLASS, ICE_CLASS = range(5)
+CLASS_COUNT = 5
+
+# Rule class of each particle type
+CLASS_TABLE = np.zeros(max(config.EMPTY, config.SNOW_FLAKES, config.SNOW,
+                           config.PACKED_SNOW, config.ICE) + 1, dtype=np.int32)
+CLASS_TABLE[config.SNOW_FLAKES] = FLAKE_CLASS
+CLASS_TABLE[config.SNOW] = SNOW_CLASS
+CLASS_TABLE[config.PACKED_SNOW] = PACKED_CLASS
+CLASS_TABLE[config.ICE] = ICE_CLASS
+
+# Neighbor (dy, dx) of each digit: left, right, up, down, then the diagonals
+NEIGHBOR_OFFSETS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+ADJACENT_DIGITS = [0, 1, 2, 3]
+DIAGONAL_DIGITS = [4, 5, 6, 7]
+UP_DIGIT, DOWN_DIGIT = 2, 3
+FLOOR_BIT = CLASS_COUNT ** len(NEIGHBOR_OFFSETS)
+CODE_COUNT = 2 * FLOOR_BIT
+
+# Table value for a transition that can never happen
+NEVER = np.iinfo(np.int16).max
+
+def neighborhood_codes(grid, floor_mask):
+    """Encode the neighborhood of every cell of a grid of particle types."""
+    height, width = grid.shape
+    padded = np.pad(CLASS_TABLE[grid], 1)  # Pads with EMPTY_CLASS
+    codes = floor_mask.astype(np.int32) * FLOOR_BIT
+    for digit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+        codes += padded[1+dy:1+dy+height, 1+dx:1+dx+width] * CLASS_COUNT ** digit
+    return codes
+
+@lru_cache(maxsize=1)
+def decode_all():
+    """Get the neighbor classes (code, digit) and floor bit of every code."""
+    codes = np.arange(CODE_COUNT)
+    digits = np.stack([((codes // CLASS_COUNT ** digit) % CLASS_COUNT).astype(np.int8)
+                       for digit in range(len(NEIGHBOR_OFFSETS))], axis=1)
+    return digits, codes >= FLOOR_BIT
+
+def count(digits, classes, which=None):
+    """Count the neighbors in any of the given classes, optionally among some digits."""
+    selected = digits if which is None else digits[:, which]
+    return np.isin(selected, classes).sum(axis=1)
+
+def compile_compression(rules):
+    """Get the stationary time a flake must exceed to turn to snow, per code."""
+    digits, at_floor = decode_all()
+    settled = [SNOW_CLASS, PACKED_CLASS, ICE_CLASS]
+
+    # At the floor with snow above, or snow on enough sides, is immediate
+    above_settled = np.isin(digits[:, UP_DIGIT], settled)
+    immediate = ((at_floor & above_settled) |
+                 (count(digits, settled, ADJACENT_DIGITS) >= rules['immediate_adjacent_snow']))
+
+    # Otherwise enough diagonal flakes for long enough, sooner with support or snow around
+    has_support = at_floor | np.isin(digits[:, DOWN_DIGIT], settled)
+    surrounded = count(digits, settled) >= rules['surrounded_snow']
+    threshold = np.where(surrounded, rules['surrounded_flakes'],
+                         np.where(has_support, rules['supported_flakes'], rules['free_flakes']))
+    required_time = np.where(surrounded, rules['surrounded_time'],
+                             np.where(has_support, rules['supported_time'], rules['free_time']))
+    enough_flakes = count(digits, [FLAKE_CLASS], DIAGONAL_DIGITS) >= threshold
+
+    table = np.where(enough_flakes, required_time, NEVER)
+    table[immediate] = -1  # Any stationary time exceeds this
+    return table.astype(np.int16)
+
+def compile_settling(rules, neighbor_classes, support_classes):
+    """Get the column depth below needed to transform settled snow, per code.
+
+    The cell transforms when enough of its 3x3 block (itself included) is in
+    neighbor_classes, or failing that the column below it is deep enough,
+    and the cell below is in support_classes.
+    """
+    digits, _ = decode_all()
+    enough_neighbors = count(digits, neighbor_classes) + 1 >= rules['neighbors']
+    supported = np.isin(digits[:, DOWN_DIGIT], support_classes)
+    table = np.where(enough_neighbors, 0, rules['depth'])
+    table[~supported] = NEVER
+    return table.astype(np.int16)
+
+def compile_packing(rules):
+    """Get the snow column depth needed for snow to pack, per code."""
+    return compile_settling(rules, [SNOW_CLASS, PACKED_CLASS],
+                            [SNOW_CLASS, PACKED_CLASS, ICE_CLASS])
+
+def compile_ice(rules):
+    """Get the packed column depth needed for packed snow to freeze, per code."""
+    return compile_settling(rules, [PACKED_CLASS, ICE_CLASS], [PACKED_CLASS, ICE_CLASS])
+
+@lru_cache(maxsize=None)
+def _compile_tables(frozen_rules):
+    """Compile frozen rule thresholds, see compile_tables."""
+    rule_set = {name: dict(values) for name, values in frozen_rules}
+    return (compile_compression(rule_set['compression']),
+            compile_packing(rule_set['packing']),
+            compile_ice(rule_set['ice']))
+
+def compile_tables(rule_set):
+    """Get the compression, packing and ice tables for a rule set, compiling each set once."""
+    return _compile_tables(tuple((name, tuple(sorted(values.items())))
+                                 for name, values in sorted(rule_set.items())))
@@ -0,0 +1,201 @@
+"""Shared-memory publishing of the grid for external observers.
+
+The simulation writes each published frame into one of two buffers of a
+named multiprocessing.shared_memory segment, guarded by a seqlock: a
+buffer's sequence number is odd while it is being written. Readers get
+NumPy views straight into the latest complete buffer, so they copy nothing
+and never block the simulation; a frame stays consistent until the writer
+comes back around to its buffer, which Frame.is_valid() detects.
+
+    from snow.shm import GridReader
+    with GridReader('snow') as reader:
+        frame = reader.read()
+        snow = (frame.types == 2).sum()
+        if frame.is_valid():
+            ...
+"""
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from . import config
+
+try:
+    import _posixshmem
+except ImportError:  # Windows frees a segment with its last handle, so none are left behind
+    _posixshmem = None
+
+MAGIC = 0x534e4f5753484d31  # "SNOWSHM1"
+
+# Header words (uint64)
+H_MAGIC, H_CLOSED, H_HEIGHT, H_WIDTH, H_LATEST = range(5)
+H_SEQ = 5    # Sequence number of each buffer
+H_TICK = 7   # Tick of each buffer
+HEADER_WORDS = 9
+
+# Particle types counted into each frame, by type value
+COUNT_SLOTS = max(config.EMPTY, config.SNOW_FLAKES, config.SNOW,
+                  config.PACKED_SNOW, config.ICE) + 1
+
+def buffer_layout(height, width):
+    """Get the byte offsets of each buffer's arrays and the segment size."""
+    cells = height * width
+    buffer_size = cells + cells * 4 + COUNT_SLOTS * 8  # types, colors, counts
+    buffer_size += -buffer_size % 8
+    header_size = HEADER_WORDS * 8
+    return header_size, buffer_size, header_size + 2 * buffer_size
+
+def buffer_views(buf, height, width, index):
+    """Get (types, colors, counts) views of one buffer of a segment."""
+    header_size, buffer_size, _ = buffer_layout(height, width)
+    offset = header_size + index * buffer_size
+    cells = height * width
+    types = np.ndarray((height, width), dtype=np.int8, buffer=buf, offset=offset)
+    colors = np.ndarray((height, width), dtype=np.int32, buffer=buf, offset=offset + cells)
+    counts = np.ndarray(COUNT_SLOTS, dtype=np.int64, buffer=buf, offset=offset + cells * 5)
+    return types, colors, counts
+
+def attach(name):
+    """Attach to an existing segment without taking over its cleanup."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 the tracker would unlink the segment when we exit
+        segment = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+class GridPublisher:
+    def __init__(self, name):
+        """Initialize a publisher for the segment with the given name."""
+        self.name = name
+        self.segment = None
+        self.header = None
+        self.buffers = None
+        self.shape = None
+
+    def create(self, height, width):
+        """Create the segment for a grid size, replacing any earlier one."""
+        self.close()
+        _, _, size = buffer_layout(height, width)
+        try:
+            self.segment = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by an earlier run; unlink it directly, as the tracker never knew it
+            _posixshmem.shm_unlink('/' + self.name.lstrip('/'))
+            self.segment = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=self.segment.buf)
+        self.header[:] = 0
+        self.header[H_HEIGHT] = height
+        self.header[H_WIDTH] = width
+        self.buffers = [buffer_views(self.segment.buf, height, width, index) for index in (0, 1)]
+        self.shape = (height, width)
+        self.header[H_MAGIC] = MAGIC  # Last, so readers only see a complete header
+
+    def publish(self, grid, tick):
+        """Write the grid's current state into the buffer readers aren't looking at."""
+        if self.shape != grid.grid.shape:
+            self.create(*grid.grid.shape)
+        index = 1 - int(self.header[H_LATEST])
+        types, colors, counts = self.buffers[index]
+
+        self.header[H_SEQ + index] += 1  # Odd: being written
+        types[:] = grid.grid
+        colors[:] = 0
+        flakes = grid.flakes
+        colors[flakes.live('y'), flakes.live('x')] = flakes.live('color')
+        counts[:] = np.bincount(grid.grid.ravel(), minlength=COUNT_SLOTS)[:COUNT_SLOTS]
+        self.header[H_TICK + index] = tick
+        self.header[H_SEQ + index] += 1  # Even: complete
+        self.header[H_LATEST] = index
+
+    def close(self):
+        """Mark the segment closed for readers and remove it."""
+        if self.segment is None:
+            return
+        self.header[H_CLOSED] = 1
+        self.header = self.buffers = None
+        self.segment.close()
+        self.segment.unlink()
+        self.segment = None
+        self.shape = None
+
+class Frame:
+    def __init__(self, reader, index, seq, tick, types, colors, counts):
+        """Initialize a frame of views into a reader's segment."""
+        self.reader = reader
+        self.index = index
+        self.seq = seq
+        self.tick = tick
+        self.types = types    # Particle type of each cell
+        self.colors = colors  # 0xRRGGBB of snowflake cells, 0 elsewhere
+        self.counts = counts  # Cells of each particle type, indexed by type
+
+    def is_valid(self):
+        """Check the writer hasn't started overwriting this frame since it was read."""
+        return self.reader.sequence(self.index) == self.seq
+
+    def copy(self):
+        """Get a frame with private copies of the arrays."""
+        return Frame(self.reader, self.index, self.seq, self.tick,
+                     self.types.copy(), self.colors.copy(), self.counts.copy())
+
+class GridReader:
+    def __init__(self, name):
+        """Initialize a reader of the segment with the given name."""
+        self.name = name
+        self.segment = None
+        self.header = None
+        self.shape = None
+        self.buffers = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def open(self):
+        """Attach to the segment, waiting for the publisher to set it up."""
+        self.close()
+        self.segment = attach(self.name)
+        self.header = np.ndarray(HEADER_WORDS, dtype=np.uint64, buffer=self.segment.buf)
+        while self.header[H_MAGIC] != MAGIC:
+            time.sleep(0.001)
+        self.shape = (int(self.header[H_HEIGHT]), int(self.header[H_WIDTH]))
+        self.buffers = [buffer_views(self.segment.buf, *self.shape, index) for index in (0, 1)]
+
+    def close(self):
+        """Detach from the segment."""
+        if self.segment is None:
+            return
+        self.header = self.buffers = None
+        try:
+            self.segment.close()
+        except BufferError:
+            pass  # Frames still hold views; the mapping goes when they do
+        self.segment = None
+
+    def sequence(self, index):
+        """Get the current sequence number of a buffer."""
+        return int(self.header[H_SEQ + index])
+
+    def read(self, timeout=1.0):
+        """Get views of the latest complete frame, or None if none arrives in time."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.segment is None or self.header[H_CLOSED]:
+                try:
+                    self.open()  # First read, or the publisher replaced the segment
+                except FileNotFoundError:
+                    time.sleep(0.01)
+                    continue
+            index = int(self.header[H_LATEST])
+            seq = self.sequence(index)
+            if seq and not seq % 2:
+                tick = int(self.header[H_TICK + index])
+                if self.sequence(index) == seq:
+                    return Frame(self, index, seq, tick, *self.buffers[index])
+            time.sleep(0.0005)
+        return None
@@ -0,0 +1,47 @@
+"""Warm-start snapshot cache for snow simulation."""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from . import config
+
+# Version of the snapshot arrays, part of the cache key so older files are never loaded
+FORMAT = 2
+
+def cache_key(simulation, ticks):
+    """Get a key for the scene reached by fast-forwarding a fresh simulation."""
+    grid = simulation.grid
+    source = json.dumps({
+        'format': FORMAT,
+        'config': config._config,
+        'size': [grid.width, grid.height, grid.visible_width],
+        'state': simulation.state,
+        'ticks': ticks,
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+def cache_path(key):
+    """Get the snapshot file for a cache key."""
+    return os.path.join(os.path.expanduser(config.SNAPSHOT_DIR), f"warm-{key}.npz")
+
+def load(key):
+    """Load a cached snapshot, or None if there is none."""
+    try:
+        with np.load(cache_path(key)) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None  # Missing or unreadable
+
+def save(key, data):
+    """Cache a snapshot, quietly skipping it if the cache can't be written."""
+    path = cache_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write beside the final file first so readers never see half a snapshot
+        with open(path + '.tmp', 'wb') as f:
+            np.savez_compressed(f, **data)
+        os.replace(path + '.tmp', path)
+    except OSError:
+        pass
@@ -0,0 +1,172 @@
+"""Frame streaming between a simulation server and viewer clients.
+
+Every message is a header (kind, body length) followed by a zlib compressed
+body. A client first gets a HELLO with the server's particle glyphs, then a
+KEYFRAME of the whole view, then DELTA messages with only the changed cells.
+"""
+import asyncio
+import json
+import os
+import stat
+import struct
+import zlib
+
+import numpy as np
+
+from . import config
+
+HELLO = 0     # JSON: {"glyphs": [...]} for the negative display ids
+KEYFRAME = 1  # rows, columns, then every display id and color
+DELTA = 2     # count, then flat indices, display ids and colors of changed cells
+
+HEADER = struct.Struct('!BI')
+SHAPE = struct.Struct('!HH')
+COUNT = struct.Struct('!I')
+
+# Cells travel as little-endian int32
+CELL_DTYPE = np.dtype('<i4')
+INDEX_DTYPE = np.dtype('<u4')
+
+# Unsent bytes after which a client is skipped until it catches up
+MAX_CLIENT_BACKLOG = 1 << 20
+
+def parse_address(address):
+    """Parse 'unix:PATH', 'HOST:PORT' or a socket path into (kind, target)."""
+    if address.startswith('unix:'):
+        return 'unix', address[5:]
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return 'tcp', (host or 'localhost', int(port))
+    return 'unix', address
+
+def socket_exists(path):
+    """Check for a socket at a path, raising FileExistsError if something else is there."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    return True
+
+def encode_message(kind, body):
+    """Frame a message body for the wire."""
+    body = zlib.compress(body, 1)
+    return HEADER.pack(kind, len(body)) + body
+
+async def read_message(reader):
+    """Read the next message, returning (kind, body)."""
+    kind, length = HEADER.unpack(await reader.readexactly(HEADER.size))
+    return kind, zlib.decompress(await reader.readexactly(length))
+
+def pack_keyframe(glyphs, colors):
+    """Encode a whole frame."""
+    return (SHAPE.pack(*glyphs.shape) +
+            glyphs.astype(CELL_DTYPE).tobytes() + colors.astype(CELL_DTYPE).tobytes())
+
+def pack_delta(indices, glyphs, colors):
+    """Encode the changed cells of a frame."""
+    return (COUNT.pack(len(indices)) + indices.astype(INDEX_DTYPE).tobytes() +
+            glyphs.astype(CELL_DTYPE).tobytes() + colors.astype(CELL_DTYPE).tobytes())
+
+def unpack_keyframe(body):
+    """Decode a whole frame into (display ids, colors)."""
+    rows, columns = SHAPE.unpack_from(body)
+    cells = np.frombuffer(body, dtype=CELL_DTYPE, offset=SHAPE.size).astype(int)
+    return cells[:rows * columns].reshape(rows, columns), cells[rows * columns:].reshape(rows, columns)
+
+def apply_delta(body, glyphs, colors):
+    """Apply the changed cells of a delta to a frame in place."""
+    count, = COUNT.unpack_from(body)
+    offset = COUNT.size
+    indices = np.frombuffer(body, dtype=INDEX_DTYPE, count=count, offset=offset)
+    offset += indices.nbytes
+    cells = np.frombuffer(body, dtype=CELL_DTYPE, count=2 * count, offset=offset)
+    glyphs.flat[indices] = cells[:count]
+    colors.flat[indices] = cells[count:]
+
+class FrameServer:
+    def __init__(self, address):
+        """Initialize a server streaming frames to viewers at an address."""
+        self.address = address
+        kind, target = parse_address(address)
+        if kind == 'unix':
+            socket_exists(target)  # Never serve over a file a mistyped address names
+        self.server = None
+        # Connected clients, mapped to whether they need a keyframe next
+        self.clients = {}
+        self.hello = encode_message(HELLO, json.dumps({'glyphs': config.PARTICLE_GLYPHS}).encode())
+        self.glyphs = None  # Last broadcast frame
+        self.colors = None
+        self.socket_path = None  # Unix socket this server created, and its (device, inode)
+        self.socket_id = None
+
+    async def start(self):
+        """Start accepting viewers."""
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            if socket_exists(target):
+                os.unlink(target)  # Left behind by an earlier server
+            self.server = await asyncio.start_unix_server(self.handle_client, target)
+            info = os.lstat(target)
+            self.socket_path, self.socket_id = target, (info.st_dev, info.st_ino)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, *target)
+
+    async def stop(self):
+        """Disconnect every viewer and stop accepting new ones."""
+        if self.server is None:
+            return
+        self.server.close()
+        for writer in list(self.clients):
+            writer.close()
+        await self.server.wait_closed()
+        self.server = None
+        if self.socket_path is not None:
+            try:
+                info = os.lstat(self.socket_path)
+                if (info.st_dev, info.st_ino) == self.socket_id:
+                    os.unlink(self.socket_path)  # Still ours, not a later server's
+            except FileNotFoundError:
+                pass
+            self.socket_path = self.socket_id = None
+
+    async def handle_client(self, reader, writer):
+        """Greet a viewer, then hold the connection until it goes away."""
+        writer.write(self.hello)
+        self.clients[writer] = True
+        try:
+            while await reader.read(4096):
+                pass  # Viewers have nothing to say
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def broadcast(self, glyphs, colors):
+        """Send a frame to every viewer as a keyframe or a delta."""
+        keyframe = delta = None
+        if self.glyphs is None or self.glyphs.shape != glyphs.shape:
+            for writer in self.clients:
+                self.clients[writer] = True  # Every viewer needs the new shape
+        else:
+            changed = np.flatnonzero((self.glyphs != glyphs) | (self.colors != colors))
+            if len(changed):
+                delta = encode_message(DELTA, pack_delta(
+                    changed, glyphs.flat[changed], colors.flat[changed]))
+        self.glyphs = glyphs.copy()
+        self.colors = colors.copy()
+
+        for writer, needs_keyframe in self.clients.items():
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BACKLOG:
+                # Too far behind for deltas; resync with a keyframe once caught up
+                self.clients[writer] = True
+                continue
+            if needs_keyframe:
+                if keyframe is None:
+                    keyframe = encode_message(KEYFRAME, pack_keyframe(glyphs, colors))
+                writer.write(keyframe)
+                self.clients[writer] = False
+            elif delta is not None:
+                writer.write(delta)
@@ -0,0 +1,134 @@
+"""Parallel parameter sweeps for tuning the snow simulation.
+
+Runs a seeded headless simulation for every combination of the given
+settings, spread over a process pool, and writes summary metrics as CSV or
+JSON. Settings are config.yaml keys (or config constants) with comma
+separated values:
+
+    python -m snow.sweep base_melt_chance=0.01,0.02,0.04 base_snow_time=500,1000
+    python -m snow.sweep max_snowflakes=1000,2000 --ticks 3000 --out sweep.json
+
+The wind blows in gusts that ramp up from calm every --gust-every ticks, as
+the arrow keys start them, so the wind settings have something to act on.
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import yaml
+
+from . import config
+from .bench import POPULATIONS, run_simulation
+from .main import parse_size
+
+# Settings only the interactive loop reads, so sweeping them would give identical runs
+INTERACTIVE_SETTINGS = {'ADAPTIVE_QUALITY', 'MIN_QUALITY'}
+# Settings that only matter while the wind changes, so not with --gust-every 0
+GUST_SETTINGS = {'WIND_RAMP_SPEED'}
+
+def parse_setting(text):
+    """Parse KEY=V1,V2,... into (key, values), reading values as YAML scalars."""
+    key, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE[,VALUE...], got {text!r}")
+    try:
+        name = config.setting_name(key)
+    except KeyError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if name in INTERACTIVE_SETTINGS:
+        raise argparse.ArgumentTypeError(f"{key} has no effect on headless runs")
+    return key, [yaml.safe_load(value) for value in values.split(',')]
+
+def run_point(point):
+    """Run one sweep point and summarize it; runs in a worker process."""
+    overrides, seed, args = point
+    scenario = {
+        'temperature': args.temperature,
+        'wind': args.wind,
+        'spawn_rate': args.spawn_rate,
+        'gust_every': args.gust_every,
+    }
+    run = run_simulation(args.size, scenario, seed, args.ticks, args.sample_every, overrides)
+    half = len(run['heights']) // 2
+    row = dict(overrides, seed=seed)
+    row.update({
+        'ticks_per_second': round(run['ticks_per_second'], 1),
+        'final_height': run['heights'][-1],
+        'mean_height': float(np.mean(run['heights'][half:])),
+        'final_backoff': run['backoffs'][-1],
+        'max_backoff': max(run['backoffs']),
+    })
+    for name in POPULATIONS:
+        series = run['populations'][name]
+        row[f'{name}_final'] = series[-1]
+        row[f'{name}_mean'] = float(np.mean(series[half:]))  # Second half, past spin-up
+    row['height_curve'] = run['heights']
+    row['backoff_curve'] = [round(value, 3) for value in run['backoffs']]
+    return row
+
+def write_csv(rows, f):
+    """Write sweep rows as CSV, with curves as space separated samples."""
+    writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({key: ' '.join(map(str, value)) if isinstance(value, list) else value
+                         for key, value in row.items()})
+
+def parse_args(argv):
+    """Parse the command line."""
+    defaults = config.DEFAULT_STATE
+    parser = argparse.ArgumentParser(prog='snow.sweep', description=__doc__.splitlines()[0])
+    parser.add_argument('settings', nargs='*', type=parse_setting, metavar='KEY=V1,V2,...',
+                        help="setting and the values to sweep it over")
+    parser.add_argument('--ticks', type=int, default=2000, help="ticks per run")
+    parser.add_argument('--seeds', type=int, default=1, help="seeded runs per combination")
+    parser.add_argument('--size', type=parse_size, default=(80, 24), metavar='WIDTHxHEIGHT',
+                        help="visible scene size")
+    parser.add_argument('--temperature', type=float, default=defaults.get('temperature', 0))
+    parser.add_argument('--wind', type=float, default=defaults.get('wind_strength', 0),
+                        help="strength of the wind, or of each gust")
+    parser.add_argument('--gust-every', type=int, default=100, metavar='TICKS',
+                        help="ticks between gusts ramping up from calm, 0 for a steady wind")
+    parser.add_argument('--spawn-rate', type=float, default=defaults.get('current_spawn_rate', 0.1))
+    parser.add_argument('--sample-every', type=int, default=50, help="ticks between samples")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--out', help="write to a .csv or .json file instead of CSV on stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    """Run the sweep."""
+    args = parse_args(argv)
+    keys = [key for key, _ in args.settings]
+    if not args.gust_every:
+        for key in keys:
+            if config.setting_name(key) in GUST_SETTINGS:
+                sys.exit(f"snow.sweep: {key} has no effect on a steady wind; drop --gust-every 0")
+    combinations = itertools.product(*(values for _, values in args.settings))
+    points = [(dict(zip(keys, values)), seed, args)
+              for values in combinations for seed in range(args.seeds)]
+
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for row in pool.map(run_point, points):
+            rows.append(row)
+            print(f"[{len(rows)}/{len(points)}] " +
+                  ' '.join(f"{key}={row[key]}" for key in keys + ['seed']) +
+                  f"  height={row['final_height']}  {row['ticks_per_second']} ticks/s",
+                  file=sys.stderr)
+
+    if args.out and args.out.endswith('.json'):
+        with open(args.out, 'w') as f:
+            json.dump(rows, f, indent=2)
+    elif args.out:
+        with open(args.out, 'w', newline='') as f:
+            write_csv(rows, f)
+    else:
+        write_csv(rows, sys.stdout)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""Thin terminal viewer for a streamed snow simulation."""
+import asyncio
+import json
+import signal
+import sys
+
+from . import config
+from .frame import FrameEncoder
+from .input import InputReader
+from .stream import HELLO, KEYFRAME, DELTA, parse_address, read_message, unpack_keyframe, apply_delta
+
+class Viewer:
+    def __init__(self, address):
+        """Initialize a viewer for the server at an address."""
+        self.address = address
+        self.term = config.term
+        self.encoder = FrameEncoder(self.term)
+        self.glyphs = None  # Latest frame received
+        self.colors = None
+        self.dirty = False  # Frame changed since it was last drawn
+        self.stopped = None
+
+    def stop(self):
+        """Stop viewing."""
+        if self.stopped is not None:
+            self.stopped.set()
+
+    def handle_message(self, kind, body):
+        """Update the frame from a server message."""
+        if kind == HELLO:
+            # Negative display ids refer to the server's particle glyphs
+            for i, char in enumerate(json.loads(body)['glyphs']):
+                self.encoder.glyphs[-1 - i] = char.encode()
+        elif kind == KEYFRAME:
+            self.glyphs, self.colors = unpack_keyframe(body)
+            self.dirty = True
+        elif kind == DELTA and self.glyphs is not None:
+            apply_delta(body, self.glyphs, self.colors)
+            self.dirty = True
+
+    async def receive_task(self, reader):
+        """Apply server messages until the server goes away."""
+        try:
+            while True:
+                self.handle_message(*await read_message(reader))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self.stop()
+
+    async def input_task(self, reader):
+        """Quit on q."""
+        while True:
+            for event in await reader.get_events():
+                if event == 'q':
+                    self.stop()
+                    return
+
+    async def render_task(self):
+        """Draw the latest frame, cropped to this terminal."""
+        while True:
+            if self.dirty:
+                self.dirty = False
+                # Leave the last row free so the final newline doesn't scroll
+                rows, columns = self.term.height - 1, self.term.width
+                self.encoder.encode(self.glyphs[:rows, :columns], self.colors[:rows, :columns])
+                self.encoder.flush(sys.stdout.fileno())
+            await asyncio.sleep(config.FRAME_DELAY)
+
+    async def drive(self):
+        """Connect and run the receive, input and render tasks until stopped."""
+        loop = asyncio.get_running_loop()
+        self.stopped = asyncio.Event()
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            reader, writer = await asyncio.open_unix_connection(target)
+        else:
+            reader, writer = await asyncio.open_connection(*target)
+        loop.add_signal_handler(signal.SIGINT, self.stop)
+
+        keys = InputReader(sys.stdin.fileno())
+        keys.start(loop)
+        tasks = [
+            asyncio.ensure_future(self.receive_task(reader)),
+            asyncio.ensure_future(self.input_task(keys)),
+            asyncio.ensure_future(self.render_task()),
+        ]
+        try:
+            await self.stopped.wait()
+        finally:
+            keys.stop()
+            loop.remove_signal_handler(signal.SIGINT)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+    def run(self):
+        """Run the viewer."""
+        with self.term.fullscreen(), self.term.cbreak(), self.term.hidden_cursor():
+            print(self.term.home + self.term.clear)
+            asyncio.run(self.drive())
+        print(self.term.normal)
@@ -0,0 +1,88 @@
+"""Chunked storage for the parts of a wide world outside the simulated window."""
+import numpy as np
+
+from . import config
+
+class ChunkStore:
+    def __init__(self, height, size=None):
+        """Initialize an empty store of size x size tiles (config.CHUNK_SIZE) for a world of the given height."""
+        self.height = height
+        self.size = config.CHUNK_SIZE if size is None else size
+        # (chunk row, chunk column) -> (types, stationary_time) of tiles holding particles
+        self.chunks = {}
+
+    def __len__(self):
+        """Get the number of allocated chunks."""
+        return len(self.chunks)
+
+    @property
+    def nbytes(self):
+        """Get the memory held by the allocated chunks."""
+        return sum(types.nbytes + stationary.nbytes for types, stationary in self.chunks.values())
+
+    def tiles(self, x, width):
+        """Yield (key, tile slices, region slices) of the chunks overlapping a column range."""
+        size = self.size
+        for row in range(0, (self.height + size - 1) // size):
+            top, bottom = row * size, min((row + 1) * size, self.height)
+            for col in range(x // size, (x + width + size - 1) // size):
+                left, right = max(col * size, x), min((col + 1) * size, x + width)
+                yield ((row, col),
+                       (slice(0, bottom - top), slice(left - col * size, right - col * size)),
+                       (slice(top, bottom), slice(left - x, right - x)))
+
+    def read(self, x, width):
+        """Get the types and stationary times of the columns x to x + width."""
+        types = np.full((self.height, width), config.EMPTY, dtype=int)
+        stationary = np.zeros((self.height, width), dtype=int)
+        for key, tile, region in self.tiles(x, width):
+            chunk = self.chunks.get(key)
+            if chunk is not None:
+                types[region] = chunk[0][tile]
+                stationary[region] = chunk[1][tile]
+        return types, stationary
+
+    def take(self, x, width):
+        """Read the columns x to x + width and release them from the store."""
+        types, stationary = self.read(x, width)
+        self.write(x, np.full_like(types, config.EMPTY), np.zeros_like(stationary))
+        return types, stationary
+
+    def write(self, x, types, stationary):
+        """Store the columns starting at x, allocating and releasing chunks as needed."""
+        for key, tile, region in self.tiles(x, types.shape[1]):
+            chunk = self.chunks.get(key)
+            occupied = types[region] != config.EMPTY
+            if chunk is None:
+                if not occupied.any():
+                    continue  # Leave empty space unallocated
+                chunk = (np.full((self.size, self.size), config.EMPTY, dtype=np.int8),
+                         np.zeros((self.size, self.size), dtype=np.int32))
+                self.chunks[key] = chunk
+            chunk[0][tile] = types[region]
+            chunk[1][tile] = np.where(occupied, stationary[region], 0)
+            if (chunk[0] == config.EMPTY).all():
+                del self.chunks[key]
+
+    def snapshot(self):
+        """Get the allocated chunks as arrays."""
+        keys = sorted(self.chunks)
+        shape = (len(keys), self.size, self.size)
+        return {
+            'chunk_keys': np.array(keys, dtype=int).reshape(len(keys), 2),
+            'chunk_types': np.array([self.chunks[key][0] for key in keys],
+                                    dtype=np.int8).reshape(shape),
+            'chunk_stationary': np.array([self.chunks[key][1] for key in keys],
+                                         dtype=np.int32).reshape(shape),
+        }
+
+    def restore(self, data):
+        """Replace the chunks with ones from a snapshot."""
+        keys, types, stationary = data['chunk_keys'], data['chunk_types'], data['chunk_stationary']
+        if types.shape[1:] != (self.size, self.size):
+            raise ValueError(f"Snapshot chunks are {types.shape[1:]}, "
+                             f"store uses {self.size}x{self.size}")
+        if stationary.shape != types.shape or keys.shape != (len(types), 2):
+            raise ValueError("Snapshot chunk arrays don't match")
+        self.chunks = {tuple(key): (tile_types.copy(), tile_stationary.copy())
+                       for key, tile_types, tile_stationary in zip(keys.tolist(), types, stationary)}
@@ -0,0 +1,56 @@
+import pytest
+
+from snow.clock import SimulationClock
+
+# A power of two, so elapsed times add up exactly
+TIMESTEP = 1 / 16
+
+class FakeTime:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def time():
+    return FakeTime()
+
+@pytest.fixture
+def clock(time):
+    return SimulationClock(TIMESTEP, 5, time_source=time)
+
+def test_first_advance_starts_the_clock(clock, time):
+    assert clock.advance() == 0
+    assert clock.time_until_next() == TIMESTEP
+
+def test_advance_runs_the_ticks_due_and_keeps_the_remainder(clock, time):
+    clock.advance()
+    time.now += 2.5 * TIMESTEP
+    assert clock.advance() == 2
+    assert clock.time_until_next() == 0.5 * TIMESTEP
+    time.now += 0.5 * TIMESTEP
+    assert clock.advance() == 1
+    assert clock.time_until_next() == TIMESTEP
+
+def test_catch_up_is_capped_and_the_backlog_dropped(clock, time):
+    clock.advance()
+    time.now += 20.25 * TIMESTEP
+    assert clock.advance() == 5
+    assert clock.time_until_next() == 0.75 * TIMESTEP  # Only the part tick is kept
+    time.now += 0.75 * TIMESTEP
+    assert clock.advance() == 1
+
+def test_time_until_next_never_goes_negative(clock):
+    clock.accumulator = 3 * TIMESTEP  # Due ticks not yet taken by advance
+    assert clock.time_until_next() == 0.0
+
+def test_reset_forgets_elapsed_time(clock, time):
+    clock.advance()
+    time.now += 0.5 * TIMESTEP
+    clock.advance()
+    clock.reset()
+    time.now += 10.0  # Paused
+    assert clock.advance() == 0
+    time.now += TIMESTEP
+    assert clock.advance() == 1
@@ -0,0 +1,32 @@
+import pytest
+
+from snow import config
+from snow.governor import QualityGovernor
+from snow.physics import Physics
+from snow.grid import Grid
+from snow.world import ChunkStore
+
+def test_overrides_restore_the_settings():
+    before = config.CHUNK_SIZE
+    with config.overrides({'chunk_size': 16}):
+        assert config.CHUNK_SIZE == 16
+    assert config.CHUNK_SIZE == before
+
+def test_overrides_reach_objects_created_inside():
+    with config.overrides({'chunk_size': 16, 'min_quality': 0.5, 'adaptive_quality': False}):
+        assert ChunkStore(32).size == 16
+        governor = QualityGovernor(0.05)
+        assert governor.min_quality == 0.5 and not governor.enabled
+
+def test_overrides_reach_snow_masses():
+    masses = [2.0] * len(config.SNOW_MASSES)
+    with config.overrides({'snow_masses': masses}):
+        physics = Physics(Grid((20, 10)))
+    physics.grid.add_flake(0, 3)
+    assert physics.get_snowflake_mass(3, 0) == 2.0
+
+@pytest.mark.parametrize('key', ['snow', 'snow_chars', 'sprites', 'brush', 'nonsense'])
+def test_overrides_refuse_settings_they_cannot_apply(key):
+    with pytest.raises(KeyError):
+        with config.overrides({key: 1}):
+            pass
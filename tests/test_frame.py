@@ -0,0 +1,83 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from blessed import Terminal
+
+from snow import config
+from snow.frame import FrameEncoder
+
+@pytest.fixture
+def term():
+    return Terminal(kind='xterm-256color', force_styling=True, stream=io.StringIO())
+
+def encoder_for(term, mode):
+    with config.overrides({'color_mode': mode}):
+        return FrameEncoder(term)
+
+def expected_frame(term, glyphs, colors):
+    """Encode a truecolor frame cell by cell."""
+    text = term.home
+    last = None
+    for glyph_row, color_row in zip(glyphs.tolist(), colors.tolist()):
+        for display_id, color in zip(glyph_row, color_row):
+            if color != last:
+                text += '\x1b[37m' if color < 0 else (
+                    f"\x1b[38;2;{color >> 16};{(color >> 8) & 0xff};{color & 0xff}m")
+                last = color
+            text += config.PARTICLE_GLYPHS[-1 - display_id] if display_id < 0 else chr(display_id)
+        text += '\n'
+    return text.encode()
+
+def encoded(encoder):
+    return bytes(encoder.buffer[:encoder.length])
+
+def test_encode_matches_the_cells(term):
+    encoder = encoder_for(term, 'truecolor')
+    glyphs = np.array([[ord(' '), -1, -len(config.PARTICLE_GLYPHS)],
+                       [ord('#'), ord('é'), -2]])
+    colors = np.array([[-1, 0xffffff, 0xffffff],
+                       [0x102030, -1, -1]])
+    encoder.encode(glyphs, colors)
+    assert encoded(encoder) == expected_frame(term, glyphs, colors)
+
+def test_buffer_grows_for_large_frames(term):
+    encoder = encoder_for(term, 'truecolor')
+    rng = np.random.default_rng(0)
+    glyphs = rng.choice([ord(' '), ord('x'), -1, -2], size=(60, 200))
+    colors = rng.integers(0, 1 << 24, size=glyphs.shape)
+    encoder.encode(glyphs, colors)
+    assert encoded(encoder) == expected_frame(term, glyphs, colors)
+    small = np.full((2, 2), ord('x'))
+    encoder.encode(small, np.full((2, 2), -1))
+    assert encoded(encoder) == term.home.encode() + b'\x1b[37mxx\nxx\n'
+
+def test_mono_switches_color_once(term):
+    encoder = encoder_for(term, 'mono')
+    glyphs = np.full((3, 4), ord('x'))
+    colors = np.arange(12).reshape(3, 4) * 0x010101
+    encoder.encode(glyphs, colors)
+    assert encoded(encoder).count(b'\x1b[37m') == 1
+
+def test_flush_writes_the_whole_frame(term):
+    encoder = encoder_for(term, 'truecolor')
+    glyphs = np.full((5, 10), -1)
+    encoder.encode(glyphs, np.full(glyphs.shape, 0xabcdef))
+    read_fd, write_fd = os.pipe()
+    encoder.flush(write_fd)
+    os.close(write_fd)
+    with os.fdopen(read_fd, 'rb') as f:
+        assert f.read() == encoded(encoder)
+
+def test_truecolor_flake_colors_are_not_kept(term):
+    encoder = encoder_for(term, 'truecolor')
+    escapes, glyphs = len(encoder.escapes), len(encoder.glyphs)
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        frame = np.full((10, 10), -1)
+        colors = rng.integers(0xaaaaaa, 0xffffff, size=frame.shape)
+        encoder.encode(frame, colors)
+        assert encoded(encoder) == expected_frame(term, frame, colors)
+    encoder.encode(np.full((1, 2), ord('€')), np.full((1, 2), -1))
+    assert (len(encoder.escapes), len(encoder.glyphs)) == (escapes, glyphs)
@@ -0,0 +1,69 @@
+import pytest
+
+from snow import config
+from snow.governor import QUALITY_STEP, SETTLE_TICKS, QualityGovernor
+from snow.grid import Grid
+from snow.physics import Physics
+
+BUDGET = 0.05
+SLOW, FAST = 0.9 * BUDGET, 0.1 * BUDGET  # Above HIGH_LOAD, below LOW_LOAD
+
+def run(governor, seconds, ticks):
+    """Record ticks of a steady cost, returning the qualities changed to."""
+    return [governor.quality for _ in range(ticks) if governor.record(seconds)]
+
+@pytest.fixture
+def governor():
+    governor = QualityGovernor(BUDGET, min_quality=0.5, enabled=True)
+    governor.cost = SLOW  # Skip the running average's warm-up
+    return governor
+
+def test_waits_to_settle_between_steps(governor):
+    assert run(governor, SLOW, SETTLE_TICKS) == []
+    assert run(governor, SLOW, 1) == [1.0 - QUALITY_STEP]
+    assert run(governor, SLOW, SETTLE_TICKS) == []
+    assert run(governor, SLOW, 1) == [1.0 - 2 * QUALITY_STEP]
+
+def test_quality_stops_at_the_floor(governor):
+    steps = run(governor, SLOW, 20 * (SETTLE_TICKS + 1))
+    assert steps == [0.875, 0.75, 0.625, 0.5]
+
+def test_recovers_when_cheap_and_holds_in_between(governor):
+    run(governor, SLOW, 2 * (SETTLE_TICKS + 1))
+    assert governor.quality == 0.75
+    # Between the thresholds nothing changes
+    governor.cost = 0.45 * BUDGET
+    assert run(governor, 0.45 * BUDGET, 5 * (SETTLE_TICKS + 1)) == []
+    # Recovery waits for the average to fall below LOW_LOAD, then climbs back to full
+    steps = run(governor, FAST, 20 * (SETTLE_TICKS + 1))
+    assert steps == [0.875, 1.0]
+
+def test_disabled_never_changes(governor):
+    governor.enabled = False
+    assert run(governor, SLOW, 10 * SETTLE_TICKS) == []
+    assert governor.quality == 1.0
+
+def test_apply_scales_the_settings():
+    grid = Grid((40, 20))
+    physics = Physics(grid)
+    governor = QualityGovernor(BUDGET)
+    margin = (grid.width - grid.visible_width) // 2
+
+    governor.quality = 0.5
+    governor.apply(grid, physics)
+    assert grid.max_flakes == int(config.MAX_SNOWFLAKES_LIMIT * 0.5)
+    assert grid.spawn_scale == 0.5
+    assert physics.margin_width == round(margin * 0.5)
+    assert physics.backoff_interval == 2
+    assert physics.active_columns() == (grid.visible_start - physics.margin_width,
+                                        grid.visible_start + grid.visible_width + physics.margin_width)
+
+    governor.quality = 0.375
+    governor.apply(grid, physics)
+    assert physics.backoff_interval == 3
+
+    governor.quality = 1.0
+    governor.apply(grid, physics)
+    assert grid.max_flakes == config.MAX_SNOWFLAKES_LIMIT and grid.spawn_scale == 1.0
+    assert physics.margin_width is None and physics.backoff_interval == 1
+    assert physics.active_columns() == (0, grid.width)
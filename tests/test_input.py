@@ -0,0 +1,37 @@
+from snow.input import InputParser, MouseEvent
+
+def keys(events):
+    return [event.name or str(event) for event in events]
+
+def test_plain_keys_and_arrows():
+    parser = InputParser()
+    events = parser.feed(b'q\x1b[A\x1bOD ')
+    assert keys(events) == ['q', 'KEY_UP', 'KEY_LEFT', ' ']
+
+def test_mouse_press_and_release_are_zero_based():
+    parser = InputParser()
+    assert parser.feed(b'\x1b[<0;10;5M\x1b[<0;10;5m') == [MouseEvent(0, 9, 4, True),
+                                                          MouseEvent(0, 9, 4, False)]
+
+def test_sequences_split_across_reads():
+    parser = InputParser()
+    assert parser.feed(b'\x1b[<0;1') == []
+    assert parser.feed(b'2;3M\x1b') == [MouseEvent(0, 11, 2, True)]
+    assert keys(parser.feed(b'[C')) == ['KEY_RIGHT']
+
+def test_utf8_split_across_reads():
+    parser = InputParser()
+    data = '❄'.encode()
+    assert parser.feed(data[:1]) == []
+    assert keys(parser.feed(data[1:])) == ['❄']
+
+def test_lone_escape_waits_for_flush():
+    parser = InputParser()
+    assert parser.feed(b'\x1b') == []
+    assert [str(event) for event in parser.flush()] == ['\x1b']
+    assert [str(event) for event in parser.feed(b'\x1bx')] == ['\x1b', 'x']
+
+def test_malformed_mouse_sequence_is_dropped():
+    parser = InputParser()
+    assert keys(parser.feed(b'\x1b[<0;x;1Mq')) == ['x', ';', '1', 'M', 'q']
+    assert parser.feed(b'\x1b[<1;2M') == []  # Too few parameters
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from snow.physics import sample_cells
+
+@pytest.mark.parametrize('size, count', [(1000, 1), (1000, 30), (1000, 499), (10, 6), (10, 10)])
+def test_sample_cells_picks_distinct_cells(size, count):
+    np.random.seed(size + count)
+    cells = np.arange(size) * 7
+    picked = sample_cells(cells, count)
+    assert len(picked) == count and len(np.unique(picked)) == count
+    assert np.isin(picked, cells).all()
+
+def test_sample_cells_is_uniform():
+    np.random.seed(0)
+    hits = np.bincount(np.concatenate([sample_cells(np.arange(50), 5) for _ in range(4000)]),
+                       minlength=50)
+    assert hits.min() > 300 and hits.max() < 500  # 400 expected for each cell
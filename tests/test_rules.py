@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from snow import config, rules
+
+SETTLED = (config.SNOW, config.PACKED_SNOW, config.ICE)
+ADJACENT = [(0, -1), (0, 1), (-1, 0), (1, 0)]
+DIAGONAL = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+def cell(grid, y, x):
+    """Get a cell's type, or None out of bounds."""
+    if 0 <= y < grid.shape[0] and 0 <= x < grid.shape[1]:
+        return grid[y, x]
+    return None
+
+def neighbors(grid, y, x, offsets):
+    return [cell(grid, y + dy, x + dx) for dy, dx in offsets]
+
+def block_count(grid, y, x, types):
+    """Count the cells of the 3x3 block around a cell, itself included, in types."""
+    offsets = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+    return sum(value in types for value in neighbors(grid, y, x, offsets))
+
+def depth_below(grid, y, x, types):
+    depth = 0
+    while y + depth + 1 < grid.shape[0] and grid[y + depth + 1, x] in types:
+        depth += 1
+    return depth
+
+def compresses(grid, floor, y, x, stationary, rule):
+    """Whether a flake turns to snow, checked cell by cell as the rules describe."""
+    if floor[y, x] and cell(grid, y - 1, x) in SETTLED:
+        return True
+    adjacent_snow = sum(value in SETTLED for value in neighbors(grid, y, x, ADJACENT))
+    if adjacent_snow >= rule['immediate_adjacent_snow']:
+        return True
+    diagonal = neighbors(grid, y, x, DIAGONAL)
+    snow_neighbors = adjacent_snow + sum(value in SETTLED for value in diagonal)
+    flake_neighbors = sum(value == config.SNOW_FLAKES for value in diagonal)
+    has_support = floor[y, x] or cell(grid, y + 1, x) in SETTLED
+    if snow_neighbors >= rule['surrounded_snow']:
+        threshold, required_time = rule['surrounded_flakes'], rule['surrounded_time']
+    elif has_support:
+        threshold, required_time = rule['supported_flakes'], rule['supported_time']
+    else:
+        threshold, required_time = rule['free_flakes'], rule['free_time']
+    return flake_neighbors >= threshold and stationary > required_time
+
+def settles(grid, y, x, rule, neighbor_types, support_types):
+    """Whether settled snow transforms, checked cell by cell as the rules describe."""
+    return ((block_count(grid, y, x, neighbor_types) >= rule['neighbors'] or
+             depth_below(grid, y, x, neighbor_types) >= rule['depth']) and
+            cell(grid, y + 1, x) in support_types)
+
+def random_grid(seed, types, shape=(16, 16)):
+    rng = np.random.default_rng(seed)
+    grid = rng.choice(types, size=shape)
+    floor = rng.random(shape) < 0.2
+    return grid, floor, rules.neighborhood_codes(grid, floor)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_compression_table_matches_the_rules(seed):
+    rule = config.RULES['compression']
+    table = rules.compile_compression(rule)
+    types = [config.EMPTY, config.SNOW_FLAKES, config.SNOW_FLAKES, config.SNOW, config.ICE]
+    grid, floor, codes = random_grid(seed, types)
+    for y, x in zip(*np.nonzero(grid == config.SNOW_FLAKES)):
+        for stationary in (0, 3, 4, 5, 8, 9, 15, 16):
+            expected = compresses(grid, floor, y, x, stationary, rule)
+            assert (stationary > table[codes[y, x]]) == expected, (y, x, stationary)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_packing_table_matches_the_rules(seed):
+    rule = config.RULES['packing']
+    table = rules.compile_packing(rule)
+    types = [config.EMPTY, config.SNOW, config.SNOW, config.SNOW, config.PACKED_SNOW, config.ICE]
+    grid, _, codes = random_grid(seed, types)
+    snow = (config.SNOW, config.PACKED_SNOW)
+    for y, x in zip(*np.nonzero(grid == config.SNOW)):
+        depth = depth_below(grid, y, x, snow)
+        assert (depth >= table[codes[y, x]]) == settles(grid, y, x, rule, snow, SETTLED), (y, x)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_ice_table_matches_the_rules(seed):
+    rule = config.RULES['ice']
+    table = rules.compile_ice(rule)
+    types = [config.EMPTY, config.SNOW, config.PACKED_SNOW, config.PACKED_SNOW,
+             config.PACKED_SNOW, config.ICE]
+    grid, _, codes = random_grid(seed, types)
+    packed = (config.PACKED_SNOW, config.ICE)
+    for y, x in zip(*np.nonzero(grid == config.PACKED_SNOW)):
+        depth = depth_below(grid, y, x, packed)
+        assert (depth >= table[codes[y, x]]) == settles(grid, y, x, rule, packed, packed), (y, x)
+
+def test_tables_are_compiled_once_per_rule_set():
+    assert rules.compile_tables(config.RULES) is rules.compile_tables(dict(config.RULES))
@@ -0,0 +1,87 @@
+import os
+import subprocess
+import sys
+from itertools import count
+
+import numpy as np
+import pytest
+
+from snow import config
+from snow.grid import Grid
+from snow.shm import GridPublisher, GridReader, H_LATEST, H_SEQ
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_names = count()
+
+@pytest.fixture
+def name():
+    return f"snowtest-{os.getpid()}-{next(_names)}"
+
+@pytest.fixture
+def grid():
+    grid = Grid((20, 13))
+    grid.grid[-2, :] = config.SNOW
+    grid.add_flake(0, 5, color=0x123456)
+    return grid
+
+@pytest.fixture
+def publisher(name):
+    publisher = GridPublisher(name)
+    yield publisher
+    publisher.close()
+
+def test_read_returns_views_of_the_published_frame(publisher, grid, name):
+    publisher.publish(grid, 7)
+    with GridReader(name) as reader:
+        frame = reader.read()
+        assert frame.tick == 7
+        assert np.array_equal(frame.types, grid.grid)
+        assert frame.colors[0, 5] == 0x123456
+        assert frame.counts[config.SNOW] == grid.width
+        assert frame.counts[config.SNOW_FLAKES] == 1
+        assert not frame.types.flags.owndata  # A view into the segment, not a copy
+        del frame
+
+def test_frame_stays_valid_until_its_buffer_is_rewritten(publisher, grid, name):
+    publisher.publish(grid, 1)
+    with GridReader(name) as reader:
+        frame = reader.read()
+        publisher.publish(grid, 2)  # Writes the other buffer
+        assert frame.is_valid()
+        publisher.publish(grid, 3)  # Back to this frame's buffer
+        assert not frame.is_valid()
+        assert reader.read().tick == 3
+        del frame
+
+def test_read_skips_a_buffer_being_written(publisher, grid, name):
+    publisher.publish(grid, 1)
+    latest = int(publisher.header[H_LATEST])
+    publisher.header[H_SEQ + latest] += 1  # Odd: as if the writer were midway through it
+    with GridReader(name) as reader:
+        assert reader.read(timeout=0.05) is None
+
+def test_reader_follows_a_resized_segment(publisher, grid, name):
+    publisher.publish(grid, 1)
+    with GridReader(name) as reader:
+        assert reader.read().types.shape == grid.grid.shape
+        publisher.publish(Grid((30, 15)), 2)
+        frame = reader.read()
+        assert frame.tick == 2 and frame.types.shape == (12, 60)
+        del frame
+
+def test_create_replaces_a_leftover_segment(name):
+    # A crashed run leaves the segment behind and its tracker is gone, so run it apart
+    script = f"""
+from multiprocessing import resource_tracker, shared_memory
+from snow.shm import GridPublisher
+leftover = shared_memory.SharedMemory(name={name!r}, create=True, size=64)
+resource_tracker.unregister(leftover._name, 'shared_memory')
+leftover.close()
+publisher = GridPublisher({name!r})
+publisher.create(4, 6)
+publisher.close()
+"""
+    result = subprocess.run([sys.executable, '-c', script], cwd=ROOT,
+                            capture_output=True, text=True, timeout=30)
+    assert result.returncode == 0, result.stderr
+    assert 'Traceback' not in result.stderr
@@ -0,0 +1,65 @@
+import random
+
+import numpy as np
+import pytest
+
+from snow import config, snapshot
+from snow.main import SnowSimulation
+
+def run(simulation, ticks, seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    for _ in range(ticks):
+        simulation.step()
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    with config.overrides({'snapshot_dir': str(tmp_path)}):
+        yield tmp_path
+
+@pytest.fixture
+def simulation():
+    simulation = SnowSimulation((40, 20))
+    run(simulation, 150, seed=3)
+    return simulation
+
+def test_cache_key_depends_on_the_scene():
+    simulation = SnowSimulation((40, 20))
+    key = snapshot.cache_key(simulation, 600)
+    assert snapshot.cache_key(SnowSimulation((40, 20)), 600) == key
+    assert snapshot.cache_key(simulation, 1200) != key
+    assert snapshot.cache_key(SnowSimulation((41, 20)), 600) != key
+    simulation.state['temperature'] += 1
+    assert snapshot.cache_key(simulation, 600) != key
+
+def test_save_and_load_round_trip(cache_dir, simulation):
+    data = simulation.snapshot()
+    snapshot.save('abc', data)
+    assert [path.name for path in cache_dir.iterdir()] == ['warm-abc.npz']
+    loaded = snapshot.load('abc')
+    assert sorted(loaded) == sorted(data)
+    for name in data:
+        assert np.array_equal(loaded[name], data[name]), name
+    assert snapshot.load('missing') is None
+
+def test_restored_simulation_continues_the_same(cache_dir, simulation):
+    snapshot.save('abc', simulation.snapshot())
+    restored = SnowSimulation((40, 20))
+    restored.restore(snapshot.load('abc'))
+    assert restored.clock.tick == simulation.clock.tick
+    assert np.array_equal(restored.grid.grid, simulation.grid.grid)
+
+    run(simulation, 100, seed=4)
+    run(restored, 100, seed=4)
+    assert np.array_equal(restored.grid.grid, simulation.grid.grid)
+    assert np.array_equal(restored.grid.stationary_time, simulation.grid.stationary_time)
+
+def test_failed_restore_leaves_the_simulation_alone(simulation):
+    data = simulation.snapshot()
+    fresh = SnowSimulation((40, 20))
+    before = fresh.grid.grid.copy()
+    del data[sorted(name for name in data if name not in ('tick', 'wind'))[-1]]
+    with pytest.raises(KeyError):
+        fresh.restore(data)
+    assert np.array_equal(fresh.grid.grid, before)
+    assert fresh.clock.tick == 0
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import socket
+import stat
+
+import numpy as np
+import pytest
+
+from snow import config
+from snow.stream import (DELTA, HELLO, KEYFRAME, FrameServer, apply_delta, encode_message,
+                         pack_delta, pack_keyframe, parse_address, read_message, unpack_keyframe)
+
+def random_frame(rng, shape=(6, 9)):
+    return rng.integers(-8, 0x2600, size=shape), rng.integers(-1, 1 << 24, size=shape)
+
+def test_parse_address():
+    assert parse_address('unix:/tmp/snow.sock') == ('unix', '/tmp/snow.sock')
+    assert parse_address('0.0.0.0:7777') == ('tcp', ('0.0.0.0', 7777))
+    assert parse_address(':7777') == ('tcp', ('localhost', 7777))
+    assert parse_address('/tmp/snow.sock') == ('unix', '/tmp/snow.sock')
+
+def test_messages_read_back_one_at_a_time():
+    async def read_all(data):
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await read_message(reader) for _ in range(3)]
+    data = (encode_message(HELLO, b'{}') + encode_message(DELTA, b'') +
+            encode_message(KEYFRAME, bytes(range(256)) * 10))
+    assert asyncio.run(read_all(data)) == [(HELLO, b'{}'), (DELTA, b''),
+                                           (KEYFRAME, bytes(range(256)) * 10)]
+
+def test_keyframe_round_trip():
+    glyphs, colors = random_frame(np.random.default_rng(0))
+    decoded_glyphs, decoded_colors = unpack_keyframe(pack_keyframe(glyphs, colors))
+    assert np.array_equal(decoded_glyphs, glyphs)
+    assert np.array_equal(decoded_colors, colors)
+
+def test_delta_updates_only_the_changed_cells():
+    rng = np.random.default_rng(1)
+    glyphs, colors = random_frame(rng)
+    new_glyphs, new_colors = glyphs.copy(), colors.copy()
+    new_glyphs[2, 3] = -1
+    new_colors[5, 8] = 0x123456
+    changed = np.flatnonzero((glyphs != new_glyphs) | (colors != new_colors))
+    apply_delta(pack_delta(changed, new_glyphs.flat[changed], new_colors.flat[changed]),
+                glyphs, colors)
+    assert np.array_equal(glyphs, new_glyphs)
+    assert np.array_equal(colors, new_colors)
+
+def test_server_sends_hello_keyframe_then_deltas(tmp_path):
+    rng = np.random.default_rng(2)
+    frames = [random_frame(rng) for _ in range(2)] + [random_frame(rng, (4, 5))]
+
+    async def session():
+        server = FrameServer(f"unix:{tmp_path / 'snow.sock'}")
+        await server.start()
+        reader, writer = await asyncio.open_unix_connection(str(tmp_path / 'snow.sock'))
+        kind, body = await read_message(reader)
+        assert kind == HELLO and config.PARTICLE_GLYPHS[0] in body.decode()
+        while not server.clients:
+            await asyncio.sleep(0.01)
+
+        received = []
+        for glyphs, colors in frames:
+            server.broadcast(glyphs, colors)
+            kind, body = await read_message(reader)
+            if kind == KEYFRAME:
+                view = unpack_keyframe(body)
+            else:
+                apply_delta(body, *view)
+            received.append((kind, view[0].copy(), view[1].copy()))
+        writer.close()
+        await server.stop()
+        return received
+
+    received = asyncio.run(session())
+    assert [kind for kind, _, _ in received] == [KEYFRAME, DELTA, KEYFRAME]
+    for (_, glyphs, colors), (sent_glyphs, sent_colors) in zip(received, frames):
+        assert np.array_equal(glyphs, sent_glyphs)
+        assert np.array_equal(colors, sent_colors)
+    assert not (tmp_path / 'snow.sock').exists()
+
+def test_server_refuses_to_replace_a_file(tmp_path):
+    path = tmp_path / 'config.yaml'
+    path.write_text('keep me')
+    with pytest.raises(FileExistsError):
+        FrameServer(str(path))
+    assert path.read_text() == 'keep me'
+
+def test_server_replaces_a_stale_socket_and_removes_only_its_own(tmp_path):
+    path = tmp_path / 'snow.sock'
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(str(path))
+    stale.close()  # Left behind, as by a server that crashed
+
+    async def session():
+        server = FrameServer(f"unix:{path}")
+        await server.start()
+        assert stat.S_ISSOCK(os.lstat(path).st_mode)
+        os.unlink(path)
+        path.write_text('since replaced')
+        await server.stop()
+    asyncio.run(session())
+    assert path.read_text() == 'since replaced'
@@ -0,0 +1,20 @@
+import argparse
+
+import pytest
+
+from snow.bench import run_simulation
+from snow.sweep import parse_setting
+
+def test_parse_setting_reads_yaml_values():
+    assert parse_setting('base_melt_chance=0.01,0.02') == ('base_melt_chance', [0.01, 0.02])
+
+@pytest.mark.parametrize('text', ['min_quality=0.5', 'snow_chars=a', 'nonsense=1', 'base_snow_time'])
+def test_parse_setting_refuses_what_a_sweep_cannot_vary(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_setting(text)
+
+def test_gusts_make_the_ramp_speed_matter():
+    scenario = {'temperature': -5, 'wind': 0.6, 'spawn_rate': 0.3, 'gust_every': 50}
+    runs = [run_simulation((40, 20), scenario, 0, 150, overrides={'wind_ramp_speed': speed})
+            for speed in (0.01, 0.5)]
+    assert runs[0]['populations'] != runs[1]['populations']
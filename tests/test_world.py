@@ -0,0 +1,98 @@
+import numpy as np
+import pytest
+
+from snow import config
+from snow.grid import Grid
+from snow.world import ChunkStore
+
+def settled_world(grid):
+    """Get the settled particles of the whole world, window included."""
+    types, _ = grid.chunks.read(0, grid.world_width)
+    window = np.where(grid.grid == config.SNOW_FLAKES, config.EMPTY, grid.grid)
+    types[:, grid.world_offset:grid.world_offset + grid.width] = window
+    return types
+
+@pytest.fixture
+def wide():
+    with config.overrides({'world_screens': 4}):
+        yield Grid((40, 20))
+
+def test_write_allocates_only_occupied_chunks():
+    store = ChunkStore(20, size=8)
+    types = np.zeros((20, 30), dtype=int)
+    stationary = np.zeros((20, 30), dtype=int)
+    types[18, 25] = config.SNOW
+    stationary[18, 25] = 7
+    store.write(10, types, stationary)
+    assert list(store.chunks) == [(2, 4)]  # Row 18, world column 35
+    read_types, read_stationary = store.read(10, 30)
+    assert np.array_equal(read_types, types)
+    assert read_stationary[18, 25] == 7
+
+def test_write_releases_chunks_that_become_empty():
+    store = ChunkStore(16, size=8)
+    types = np.full((16, 16), config.ICE, dtype=int)
+    store.write(0, types, np.zeros_like(types))
+    assert len(store) == 4
+    types[:, 8:] = config.EMPTY
+    store.write(0, types, np.zeros_like(types))
+    assert sorted(store.chunks) == [(0, 0), (1, 0)]
+
+def test_take_reads_and_releases():
+    store = ChunkStore(8, size=8)
+    types = np.full((8, 12), config.SNOW, dtype=int)
+    store.write(4, types, np.ones_like(types))
+    taken, stationary = store.take(4, 12)
+    assert np.array_equal(taken, types) and stationary.sum() == types.size
+    assert len(store) == 0 and store.nbytes == 0
+
+def test_snapshot_round_trip():
+    store = ChunkStore(16, size=8)
+    types = np.zeros((16, 20), dtype=int)
+    types[3, 17] = config.PACKED_SNOW
+    store.write(5, types, types * 2)
+    copy = ChunkStore(16, size=8)
+    copy.restore(store.snapshot())
+    assert np.array_equal(copy.read(0, 40)[0], store.read(0, 40)[0])
+    with pytest.raises(ValueError):
+        ChunkStore(16, size=4).restore(store.snapshot())
+
+def test_scroll_parks_and_restores_settled_snow(wide):
+    wide.grid[-2, 5:10] = config.SNOW
+    before = settled_world(wide)
+    start = wide.world_offset
+    assert wide.scroll(50)
+    assert len(wide.chunks) > 0
+    assert wide.scroll(-50)
+    assert wide.world_offset == start
+    assert np.array_equal(settled_world(wide), before)
+    assert (wide.grid[-2, 5:10] == config.SNOW).all()
+
+def test_scroll_stops_at_the_world_edges(wide):
+    while wide.scroll(-7):
+        pass
+    assert wide.world_offset == 0
+    while wide.scroll(7):
+        pass
+    assert wide.world_offset == wide.world_width - wide.width
+
+def test_width_resize_keeps_the_world(wide):
+    wide.grid[-2, 0:4] = config.ICE
+    wide.scroll(20)
+    wide.grid[-2, 0:4] = config.SNOW
+    offset = wide.world_offset
+    before = settled_world(wide)
+    wide.size = (36, 20)
+    wide.update_dimensions()
+    assert wide.world_offset == offset
+    after = settled_world(wide)
+    assert np.array_equal(after, before[:, :after.shape[1]])
+
+def test_height_resize_restarts_the_world(wide):
+    wide.scroll(wide.width)
+    wide.grid[-2, 0:4] = config.SNOW
+    wide.scroll(-wide.width)
+    wide.size = (40, 24)
+    wide.update_dimensions()
+    assert len(wide.chunks) == 0
+    assert wide.grid.shape == (21, 80)